@@ -0,0 +1,153 @@
+import os
+import time
+import pygame.mixer
+from audio_bank import CACHE_DIR, AudioBank
+from race_core import RaceListener
+
+SOUND_DIR = os.path.join(os.path.dirname(__file__), 'sounds')
+SOUNDS = {
+    'countdown': os.path.join(SOUND_DIR, 'countdown.mp3'),
+    'start': os.path.join(SOUND_DIR, 'start.wav'),
+    'intro': os.path.join(SOUND_DIR, 'pod_race_intro.mp3'),
+    'race_theme': os.path.join(SOUND_DIR, 'pod_race_race_theme.mp3'),
+    'engine_trouble': os.path.join(SOUND_DIR, 'engine_trouble.wav'),
+    'sand_storm': os.path.join(SOUND_DIR, 'sand_storm.wav'),
+    'debris_hit': os.path.join(SOUND_DIR, 'debris_hit.wav'),
+    'explosion': os.path.join(SOUND_DIR, 'explosion.wav'),
+    'finish': os.path.join(SOUND_DIR, 'finish.wav'),
+}
+MUSIC = ('intro', 'race_theme')
+
+# Effects that win a channel when they're all busy; higher plays first and
+# may cut off anything lower. Unlisted sounds are cosmetic (0).
+PRIORITIES = {
+    'explosion': 3,
+    'countdown': 2,
+    'start': 2,
+    'finish': 2,
+}
+REPEAT_INTERVAL = 0.15  # Seconds before the same effect may play again
+VOLUMES = {'countdown': 0.7}  # Sounds not played at full volume
+
+# Sound played for each race event; lethal events always explode
+EVENT_SOUNDS = {
+    "Engine Trouble": 'engine_trouble',
+    "Sand Storm": 'sand_storm',
+    "Debris Hit": 'debris_hit',
+}
+
+class SoundEvents:
+    # Effect requests from the simulation, played later from the frame loop.
+    # Requests for the same sound between flushes merge into one, repeats
+    # within REPEAT_INTERVAL are dropped, and when every channel is busy a
+    # sound only plays by cutting off one of lower priority.
+    def __init__(self, bank, channels, clock=time.perf_counter):
+        self.bank = bank
+        self.channels = channels
+        self.clock = clock
+        self.pending = set()
+        self.last_played = {}  # Sound name -> clock time
+        self.playing = {}  # Channel -> priority of what it was given
+
+    def request(self, name):
+        self.pending.add(name)
+
+    def flush(self):
+        if not self.pending:
+            return
+        now = self.clock()
+        for name in sorted(self.pending, key=lambda name: -PRIORITIES.get(name, 0)):
+            if now - self.last_played.get(name, -REPEAT_INTERVAL) < REPEAT_INTERVAL:
+                continue
+            if not self.bank.ready(name):  # Still loading; skip rather than wait
+                continue
+            if self.play(name):
+                self.last_played[name] = now
+        self.pending.clear()
+
+    def play(self, name):
+        priority = PRIORITIES.get(name, 0)
+        channel = self.free_channel(priority)
+        if channel is None:
+            return False
+        channel.play(self.bank.get(name))
+        self.playing[channel] = priority
+        return True
+
+    def free_channel(self, priority):
+        # An idle channel, else the lowest-priority one below priority
+        lowest = None
+        for channel in self.channels:
+            if not channel.get_busy():
+                return channel
+            if lowest is None or self.playing.get(channel, 0) < self.playing.get(lowest, 0):
+                lowest = channel
+        return lowest if self.playing.get(lowest, 0) < priority else None
+
+class RaceAudio(RaceListener):
+    def __init__(self, cache_dir=CACHE_DIR):
+        # Initialize pygame mixer with higher frequency for faster playback
+        pygame.mixer.init(44100, -16, 2, 512, allowedchanges=0)
+        pygame.mixer.set_num_channels(8)
+
+        # Channel 0 is kept for music, so effects never cut it off
+        pygame.mixer.set_reserved(1)
+        self.music = pygame.mixer.Channel(0)
+        self.track = None  # Name of the music that should be playing
+
+        # Missing files are reported here, once, and files that fail to
+        # decode by the bank; requests for either are dropped without a
+        # lookup failing on every race event
+        available = {name: path for name, path in SOUNDS.items() if os.path.exists(path)}
+        missing = sorted(set(SOUNDS) - set(available))
+        if missing:
+            print(f"Sounds not found, playing without: {', '.join(missing)}")
+        self.available = set(available)
+
+        # Sounds load in the background, in this order: effects first, then
+        # the intro (which starts as soon as it's ready), then the race
+        # theme, decoded while the odds screen is up
+        self.bank = AudioBank(available, cache_dir, VOLUMES, on_error=lambda name, error: self.available.discard(name))
+        self.bank.preload(*(name for name in available if name not in MUSIC))
+        self.play_music('intro')
+        self.bank.preload('race_theme')
+        self.effects = SoundEvents(self.bank, [pygame.mixer.Channel(i) for i in range(1, pygame.mixer.get_num_channels())])
+
+    def play_sound(self, sound_name):
+        # Queued; played on the next flush()
+        if sound_name in self.available:
+            self.effects.request(sound_name)
+
+    def flush(self):
+        # Plays queued effects; called once per drawn frame, outside the
+        # simulation step
+        self.effects.flush()
+
+    def play_music(self, name):
+        # Loops name on the music channel once loaded, unless other music
+        # was asked for in the meantime
+        if name not in self.available:
+            return
+        self.track = name
+        def start(sound):
+            if self.track == name:
+                self.music.play(sound, loops=-1)
+        self.bank.when_ready(name, start)
+
+    def play_race_theme(self):
+        # Change music to race theme; already decoded unless the race was
+        # started straight away, in which case it starts when it is
+        self.play_music('race_theme')
+
+    def racer_event(self, race, racer, event):
+        if event.lethal:
+            self.play_sound('explosion')
+        elif event.name in EVENT_SOUNDS:
+            self.play_sound(EVENT_SOUNDS[event.name])
+
+    def racer_finished(self, race, racer):
+        self.play_sound('finish')
+
+    def close(self):
+        self.bank.close()
+        pygame.mixer.quit()  # Clean up pygame mixer
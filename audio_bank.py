@@ -0,0 +1,111 @@
+import glob
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pygame.mixer
+
+# Sounds decoded once and kept on disk as raw PCM in the mixer's format, so
+# later runs memory-map them instead of decoding mp3s again. Entries are
+# keyed by the source's mtime and size plus the mixer format; a changed
+# source (or mixer setup) gets a new entry and the stale one is removed.
+# Loading happens on a background thread, one sound at a time in the order
+# requested, so nothing here blocks the UI. A sound that can't be decoded
+# (say, an mp3 on an SDL_mixer built without mp3 support) is reported once
+# and never counts as ready.
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), 'sounds', 'cache')
+
+class AudioBank:
+    def __init__(self, sources, cache_dir=CACHE_DIR, volumes=None, on_error=None):
+        # sources: sound name -> file path; the mixer must be initialized.
+        # volumes: sound name -> volume, set before the sound is ready.
+        # on_error(name, error) runs on the loader thread when a load fails.
+        self.sources = sources
+        self.cache_dir = cache_dir
+        self.volumes = volumes or {}
+        self.on_error = on_error
+        self.format = pygame.mixer.get_init()  # (frequency, format, channels)
+        self.loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='audio')
+        self.loads = {}  # name -> Future of the pygame Sound
+
+    def key(self, path):
+        stat = os.stat(path)
+        spec = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}:{self.format}"
+        return hashlib.sha1(spec.encode()).hexdigest()[:16]
+
+    def cache_path(self, name):
+        path = self.sources[name]
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.cache_dir, f"{stem}-{self.key(path)}.pcm")
+
+    def decode(self, name):
+        # From the cache if it's there, otherwise decoded now and cached
+        try:
+            cached = self.cache_path(name)
+            try:
+                pcm = np.memmap(cached, dtype=np.uint8, mode='r')
+            except (OSError, ValueError):  # Missing, or empty after a crash
+                sound = pygame.mixer.Sound(self.sources[name])
+                save_pcm(cached, sound.get_raw())
+            else:
+                sound = pygame.mixer.Sound(buffer=pcm)
+        except (pygame.error, OSError) as e:
+            print(f"Can't load sound {name!r}, playing without it: {e}")
+            if self.on_error:
+                self.on_error(name, e)
+            raise  # The load's future holds the error; ready() stays False
+        if name in self.volumes:
+            sound.set_volume(self.volumes[name])
+        return sound
+
+    def load(self, name):
+        # Future of the sound, queued for loading on first request
+        if name not in self.loads:
+            self.loads[name] = self.loader.submit(self.decode, name)
+        return self.loads[name]
+
+    def preload(self, *names):
+        for name in names:
+            self.load(name)
+
+    def ready(self, name):
+        # Loaded and usable; a failed load never is
+        future = self.loads.get(name)
+        return future is not None and future.done() and future.exception() is None
+
+    def get(self, name):
+        # Waits for the sound if it's still loading
+        return self.load(name).result()
+
+    def when_ready(self, name, callback):
+        # callback(sound) runs on the loader thread once loaded, or right
+        # away if it already is; never if the load failed
+        def done(future):
+            if not future.cancelled() and future.exception() is None:
+                callback(future.result())
+        self.load(name).add_done_callback(done)
+
+    def close(self):
+        # Drops queued loads and waits out the one in progress
+        self.loader.shutdown(wait=True, cancel_futures=True)
+
+def save_pcm(path, raw):
+    # Written to a scratch file and renamed into place, like the course
+    # geometry cache, then older entries for the same source are removed
+    directory = os.path.dirname(path)
+    stem = os.path.basename(path).rsplit('-', 1)[0]
+    scratch = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, scratch = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+        os.replace(scratch, path)
+        for stale in glob.glob(os.path.join(directory, f"{glob.escape(stem)}-*.pcm")):
+            if stale != path:
+                os.remove(stale)
+    except OSError:  # Read-only install: decode again next time
+        if scratch and os.path.exists(scratch):
+            os.remove(scratch)
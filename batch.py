@@ -0,0 +1,105 @@
+import multiprocessing
+from functools import partial
+import numpy as np
+from race_core import Race, RaceListener
+
+# Headless league runner: many races spread over a process pool. Every race
+# gets its own seed derived from (seed, race index), so results are the same
+# whatever the worker count or chunking.
+
+TICK_SECONDS = 0.02  # The interactive game steps the race every 20 ms
+MAX_TICKS = 100000  # Safety cap; races normally end long before this
+
+class FinishTimes(RaceListener):
+    def __init__(self):
+        self.ticks = {}
+
+    def racer_finished(self, race, racer):
+        # Emitted during the step, before race.ticks is incremented
+        self.ticks[racer.name] = race.ticks + 1
+
+class RaceResult:
+    def __init__(self, index, order, destroyed, finish_ticks, ticks):
+        self.index = index
+        self.order = order  # Names in finishing order (destroyed pods never finish)
+        self.destroyed = destroyed
+        self.finish_ticks = finish_ticks
+        self.ticks = ticks
+
+def race_seed(seed, index):
+    # Independent stream per race via SeedSequence's spawn keys
+    state = np.random.SeedSequence(seed, spawn_key=(index,)).generate_state(2, np.uint64)
+    return (int(state[0]) << 64) | int(state[1])
+
+def run_race(index, seed, distance, names, width, height, max_ticks=MAX_TICKS):
+    race = Race(distance, names, width, height, seed=race_seed(seed, index))
+    times = race.subscribe(FinishTimes())
+    race.run(max_ticks)
+    return RaceResult(index,
+                      [racer.name for racer in race.finished_racers],
+                      [racer.name for racer in race.racers if racer.destroyed],
+                      times.ticks,
+                      race.ticks)
+
+def run_races(count, seed, distance, names, width=1920, height=1080, workers=1, max_ticks=MAX_TICKS):
+    job = partial(run_race, seed=seed, distance=distance, names=names,
+                  width=width, height=height, max_ticks=max_ticks)
+    # Results come back in race order either way
+    if workers <= 1:
+        yield from map(job, range(count))
+        return
+    # Several chunks per worker keeps the pool balanced when race lengths vary
+    chunksize = max(1, count // (workers * 8))
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(job, range(count), chunksize)
+
+class Standings:
+    def __init__(self, names):
+        self.names = list(names)
+        self.races = 0
+        self.no_winner = 0
+        self.wins = dict.fromkeys(self.names, 0)
+        self.podiums = dict.fromkeys(self.names, 0)
+        self.finishes = dict.fromkeys(self.names, 0)
+        self.position_total = dict.fromkeys(self.names, 0)
+        self.destroyed = dict.fromkeys(self.names, 0)
+        self.finish_ticks = {name: [] for name in self.names}
+
+    def add(self, result):
+        self.races += 1
+        if not result.order:
+            self.no_winner += 1
+        for position, name in enumerate(result.order, 1):
+            self.finishes[name] += 1
+            self.position_total[name] += position
+            if position == 1:
+                self.wins[name] += 1
+            if position <= 3:
+                self.podiums[name] += 1
+        for name in result.destroyed:
+            self.destroyed[name] += 1
+        for name, tick in result.finish_ticks.items():
+            self.finish_ticks[name].append(tick)
+
+    def table(self):
+        header = f"{'Racer':<10}{'Wins':>8}{'Win %':>8}{'Podiums':>9}{'Avg pos':>9}" \
+                 f"{'Finished':>10}{'Destroyed':>11}{'Avg time':>10}{'Best':>9}"
+        lines = [header, "-" * len(header)]
+        ranked = sorted(self.names, key=lambda name: (-self.wins[name], self.names.index(name)))
+        for name in ranked:
+            finishes = self.finishes[name]
+            ticks = self.finish_ticks[name]
+            avg_pos = f"{self.position_total[name] / finishes:.2f}" if finishes else "-"
+            avg_time = f"{np.mean(ticks) * TICK_SECONDS:.1f}s" if ticks else "-"
+            best = f"{min(ticks) * TICK_SECONDS:.1f}s" if ticks else "-"
+            win_pct = 100 * self.wins[name] / max(self.races, 1)
+            lines.append(f"{name:<10}{self.wins[name]:>8}{win_pct:>7.1f}%{self.podiums[name]:>9}{avg_pos:>9}"
+                         f"{finishes:>10}{self.destroyed[name]:>11}{avg_time:>10}{best:>9}")
+        lines.append(f"{self.races} races, {self.no_winner} with no finisher")
+        return "\n".join(lines)
+
+def run_batch(count, workers, seed, distance, names, width=1920, height=1080):
+    standings = Standings(names)
+    for result in run_races(count, seed, distance, names, width, height, workers):
+        standings.add(result)
+    return standings
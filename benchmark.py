@@ -0,0 +1,497 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Benchmarks for the simulation and rendering hot paths. Drawing runs
+# against a recording stub canvas, so no display is needed.
+#
+#   python benchmark.py                       run everything, print a table
+#   python benchmark.py --filter draw         only benchmarks matching "draw"
+#   python benchmark.py --save base.json      keep the results as a baseline
+#   python benchmark.py --compare base.json   flag regressions against it
+
+DEFAULT_THRESHOLD = 0.10  # Slowdown (as a fraction of the baseline) reported as a regression
+# Comparisons use the best repeat: on a busy machine the median of a few
+# repeats wanders far more than the minimum does
+
+class RecordingCanvas:
+    # Stands in for tk.Canvas: hands out item ids and counts the calls a
+    # frame makes, which is what Tk would otherwise have to process
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.tags = {}  # item id -> tags, for find_withtag
+        self.calls = {}
+
+    def record(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def __getattr__(self, name):
+        if not name.startswith('create_'):
+            raise AttributeError(name)
+        def create(*coords, **options):
+            self.record('create')
+            item = next(self.ids)
+            self.tags[item] = options.get('tags')
+            return item
+        return create
+
+    def coords(self, item, *coords):
+        self.record('coords')
+
+    def itemconfig(self, item, **options):
+        self.record('itemconfig')
+
+    def delete(self, item):
+        self.record('delete')
+        if item == "all":
+            self.tags.clear()
+        else:
+            self.tags.pop(item, None)
+
+    def find_withtag(self, tag):
+        return [item for item, tags in self.tags.items() if tags == tag]
+
+    def tag_lower(self, item, below):
+        self.record('tag_lower')
+
+    def pack(self, **options):
+        pass
+
+class StubPhoto:
+    def configure(self, **options):
+        pass
+
+class StubMaster:
+    def __init__(self, width=1920, height=1080):
+        self.width = width
+        self.height = height
+
+    def title(self, text):
+        pass
+
+    def attributes(self, *args):
+        pass
+
+    def bind(self, sequence, handler):
+        pass
+
+    def winfo_screenwidth(self):
+        return self.width
+
+    def winfo_screenheight(self):
+        return self.height
+
+    def update(self):
+        pass
+
+    def after(self, ms, callback):
+        pass
+
+class StubButton:
+    # Lets draw_odds_screen skip creating its Tk start button
+    def destroy(self):
+        pass
+
+class RecordingTurtle:
+    # Enough of turtle.Turtle for the course drawing code
+    def __init__(self, x=0.0, y=0.0, pen_width=50):
+        self.x, self.y = x, y
+        self.pen_width = pen_width
+        self.moves = 0
+
+    def goto(self, x, y):
+        self.x, self.y = x, y
+        self.moves += 1
+
+    def penup(self):
+        pass
+
+    def pendown(self):
+        pass
+
+    def color(self, color):
+        pass
+
+    def width(self, width=None):
+        if width is None:
+            return self.pen_width
+        self.pen_width = width
+
+    def hideturtle(self):
+        pass
+
+BENCHMARKS = {}
+
+def benchmark(name, repeats=7):
+    # Registers `setup() -> (run, state)` under `name`. Only run(state) is
+    # timed; it returns how many operations it performed and results are
+    # reported per operation.
+    def register(setup):
+        BENCHMARKS[name] = (setup, repeats)
+        return setup
+    return register
+
+def measure(setup, repeats):
+    samples = []
+    for _ in range(repeats):
+        run, state = setup()
+        start = time.perf_counter()
+        operations = run(state)
+        samples.append((time.perf_counter() - start) / operations)
+    return {
+        'median_ms': statistics.median(samples) * 1000,
+        'min_ms': min(samples) * 1000,
+        'repeats': repeats,
+    }
+
+SCRATCH = []  # Temporary directories made by the benchmark being measured
+
+def scratch_dir():
+    # Removed once the benchmark's repeats are done
+    directory = tempfile.TemporaryDirectory(prefix='benchmark-')
+    SCRATCH.append(directory)
+    return directory.name
+
+def once(call):
+    # run function timing a single call(state)
+    def run(state):
+        call(state)
+        return 1
+    return run
+
+# Simulation
+
+def seeded_race(racers, obstacles_per_lane, width=1920, height=1080, spacing=None):
+    from race_core import Race, Obstacle
+    race = Race(25000, [f"Pod {i + 1}" for i in range(racers)], width, height,
+                seed=racers * 1000 + obstacles_per_lane)
+    race.obstacle_spawn_rate = 0  # Keep the obstacle count fixed while timing
+    for racer in race.racers:
+        racer.position = race.rng.uniform(0, race.distance * 0.8)
+    for lane in range(racers):
+        for j in range(obstacles_per_lane):
+            race.obstacles.add(Obstacle(lane, width - j * (spacing or race.min_obstacle_spacing), rng=race.rng))
+    return race
+
+def run_ticks(race, ticks=20):
+    for _ in range(ticks):
+        race.step()
+    return ticks
+
+for racers, per_lane in [(4, 0), (4, 1), (4, 4), (40, 1), (40, 4), (400, 1), (400, 4)]:
+    benchmark(f"race.step/{racers} racers/{per_lane} obstacles per lane")(
+        lambda racers=racers, per_lane=per_lane: (run_ticks, seeded_race(racers, per_lane)))
+
+# Far denser than spawning allows: collision cost should stay flat
+benchmark("race.step/40 racers/64 packed obstacles per lane")(
+    lambda: (run_ticks, seeded_race(40, 64, spacing=25)))
+
+@benchmark("race.step/40 racers/4 obstacles per lane/telemetry")
+def recorded_race():
+    # Same race as above with every tick recorded; includes the final flush
+    from telemetry import TelemetryRecorder
+    race = seeded_race(40, 4)
+    recorder = race.subscribe(TelemetryRecorder(scratch_dir(), race))
+    def run(race):
+        ticks = run_ticks(race)
+        recorder.close()
+        return ticks
+    return run, race
+
+@benchmark("mass_race.step/10000 racers", repeats=5)
+def mass_race():
+    from racer_state import MassRace
+    race = MassRace(25000, 10000, rng=np.random.default_rng(0))
+    return run_ticks, race
+
+@benchmark("odds.simulate/10000 races", repeats=3)
+def odds_simulate():
+    from odds import OddsEngine
+    from race_core import Race
+    race = Race(25000, ["Pod 1", "Pod 2", "Pod 3", "Pod 4"])
+    engine = OddsEngine.from_race(race)
+    speeds = [1.1, 0.9, 1.0, 1.2]
+    return once(lambda engine: engine.simulate(speeds, 10000, np.random.default_rng(0))), engine
+
+@benchmark("odds.simulate/2000 races from mid-race", repeats=3)
+def odds_live():
+    # One live odds estimate, as the worker process runs it
+    from odds import OddsEngine
+    from race_core import Race
+    race = Race(25000, ["Pod 1", "Pod 2", "Pod 3", "Pod 4"], seed=11)
+    race.run(300)
+    engine = OddsEngine.from_race(race)
+    start = engine.start_from(race)
+    return once(lambda engine: engine.simulate(start.speed, 2000, np.random.default_rng(0), start)), engine
+
+# Rendering
+
+def stub_window(width=1920, height=1080, quality='high'):
+    import sim2
+    random.seed(0)
+    # Fixed quality: the governor would otherwise adapt to this machine
+    window = sim2.RaceWindow(StubMaster(width, height), canvas=RecordingCanvas(),
+                             image_factory=lambda width, height: StubPhoto(), quality=quality)
+    window.start_button = StubButton()
+    return window
+
+def draw_frames(args, frames=10):
+    window, race = args
+    for _ in range(frames):
+        window.draw_race(race.racers, race.distance, race.obstacles)
+    return frames
+
+for racers, per_lane in [(4, 0), (4, 1), (4, 4), (500, 1)]:
+    def draw_race_setup(racers=racers, per_lane=per_lane):
+        window = stub_window()
+        race = seeded_race(racers, per_lane, window.width, window.height)
+        window.draw_race(race.racers, race.distance, race.obstacles)  # Build the scene first
+        return draw_frames, (window, race)
+    benchmark(f"draw_race/{racers} racers/{per_lane} obstacles per lane", repeats=5)(draw_race_setup)
+
+@benchmark("draw_race/500 racers/events firing", repeats=5)
+def draw_race_events():
+    # A big field 400 ticks in, a tick per frame so notifications keep
+    # arriving and scrolling; the timings include the race steps
+    window = stub_window()
+    race = seeded_race(500, 1, window.width, window.height)
+    race.subscribe(window)
+    run_ticks(race, 400)
+    window.draw_race(race.racers, race.distance, race.obstacles)
+    def run(args, frames=10):
+        window, race = args
+        for _ in range(frames):
+            race.step()
+            window.draw_race(race.racers, race.distance, race.obstacles)
+        return frames
+    return run, (window, race)
+
+def warm(draw):
+    # Screens are timed as shown the second time onwards: one-off work such
+    # as rendering static layers happens in setup
+    def setup():
+        run, state = draw()
+        run(state)
+        return run, state
+    return setup
+
+@benchmark("draw_race/scene build")
+@warm
+def draw_race_build():
+    # First race frame after another screen: the whole scene is recreated
+    def run(args):
+        window, race = args
+        window.clear_scene()
+        return draw_frames(args, 1)
+    return run, (stub_window(), seeded_race(4, 1))
+
+@benchmark("draw_countdown")
+@warm
+def draw_countdown():
+    return once(lambda window: window.draw_countdown(3)), stub_window()
+
+@benchmark("draw_podium")
+@warm
+def draw_podium():
+    race = seeded_race(4, 0)
+    race.racers[2].destroyed = True
+    return once(lambda window: window.draw_podium(race.racers[:3])), stub_window()
+
+@benchmark("draw_odds_screen")
+@warm
+def draw_odds_screen():
+    from odds import Odds
+    race = seeded_race(4, 0)
+    window = stub_window()
+    window.odds = Odds(race.racers, np.array([0, 1, 1, 2, 3, -1]))
+    return once(lambda window: window.draw_odds_screen(race.racers)), window
+
+@benchmark("draw_race/minimal quality", repeats=5)
+def draw_race_minimal():
+    # Lowest level the quality governor falls back to
+    window = stub_window(quality='minimal')
+    race = seeded_race(4, 1, window.width, window.height)
+    window.draw_race(race.racers, race.distance, race.obstacles)
+    return draw_frames, (window, race)
+
+@benchmark("draw_race/static layers", repeats=5)
+def draw_race_layers():
+    # Rendering the race backdrop from scratch (window resize, new lane count)
+    window = stub_window()
+    return once(lambda window: window.render_race_layer(window.width, window.height, 4)), window
+
+# Startup
+
+@benchmark("startup/particles", repeats=5)
+def startup_particles():
+    from particles import ParticleField
+    from raster import new_frame
+    def run(size):
+        width, height = size
+        ParticleField(width, height, int(width * height / 1000))
+        new_frame(width, height, '#C2B280')
+    return once(run), (1920, 1080)
+
+@benchmark("startup/window", repeats=5)
+def startup_window():
+    return once(lambda _: stub_window()), None
+
+@benchmark("startup/audio", repeats=3)
+def startup_audio():
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')  # No sound card needed
+    from audio import RaceAudio  # ImportError without pygame: reported as skipped
+    return once(lambda cache_dir: RaceAudio(cache_dir).close()), scratch_dir()
+
+def audio_bank():
+    # Bank for the race theme with the cache in a scratch directory
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame.mixer  # ImportError without pygame: reported as skipped
+    from audio import SOUNDS
+    from audio_bank import AudioBank
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(44100, -16, 2, 512, allowedchanges=0)
+    return AudioBank({'race_theme': SOUNDS['race_theme']}, scratch_dir())
+
+@benchmark("startup/race theme decode", repeats=3)
+def startup_theme_decode():
+    # First run: mp3 decoded and written to the cache
+    import shutil
+    def run(bank):
+        shutil.rmtree(bank.cache_dir, ignore_errors=True)
+        bank.decode('race_theme')
+        return 1
+    return run, audio_bank()
+
+@benchmark("startup/race theme cached", repeats=5)
+def startup_theme_cached():
+    # Later runs: memory-mapped from the cache
+    bank = audio_bank()
+    bank.decode('race_theme')
+    return once(lambda bank: bank.decode('race_theme')), bank
+
+# Courses
+
+@benchmark("courses/draw", repeats=5)
+def courses_draw():
+    # Generating the turtle drawing from compiled (cached) geometry
+    import courses
+    course = courses.get('default')
+    course.geometry()
+    return once(course.draw), RecordingTurtle()
+
+@benchmark("courses/compile", repeats=3)
+def courses_compile():
+    # Centerline plus distance, progress and lateral fields, uncached
+    import courses
+    return once(lambda course: course.compile()), courses.get('default')
+
+@benchmark("courses/cached geometry", repeats=5)
+def courses_cached():
+    # Startup with a warm cache: a fresh course object loading from disk
+    from courses.course import Course
+    import courses
+    path = courses._discover()['default']
+    Course.load(path).geometry()  # Make sure the cache is warm
+    return once(lambda path: Course.load(path).geometry()), path
+
+@benchmark("courses/steering lookup")
+def courses_steering():
+    import courses
+    track = courses.get('default').geometry()
+    rng = np.random.default_rng(0)
+    points = list(zip(rng.uniform(-300, 300, 10000), rng.uniform(-200, 400, 10000)))
+    def run(points):
+        for x, y in points:
+            track.heading_at(track.progress_at(x, y) + 30) - track.lateral_at(x, y)
+            track.gradient_at(x, y)
+        return len(points)
+    return run, points
+
+for racers in (6, 1000):
+    def turtle_field(racers=racers):
+        # sim.py's per-tick update for the whole field, as in --headless
+        import courses
+        from sim import Field
+        course = courses.get('default')
+        return run_ticks, Field(course, course.geometry(), racers, np.random.default_rng(0))
+    benchmark(f"sim.Field.step/{racers} racers")(turtle_field)
+
+def run_benchmarks(pattern=None, repeats=None):
+    results = {}
+    for name, (setup, default_repeats) in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        try:
+            results[name] = measure(setup, repeats or default_repeats)
+        except ImportError as e:
+            results[name] = {'skipped': str(e)}
+        finally:
+            while SCRATCH:
+                SCRATCH.pop().cleanup()
+        report(name, results[name])
+    return results
+
+def report(name, result, baseline=None, threshold=DEFAULT_THRESHOLD):
+    if 'skipped' in result:
+        print(f"{name:<50} skipped ({result['skipped']})")
+        return None
+    line = f"{name:<50} {result['min_ms']:>10.4f} ms  (median {result['median_ms']:.4f})"
+    if not baseline or 'min_ms' not in baseline:
+        print(line)
+        return None
+    change = result['min_ms'] / baseline['min_ms'] - 1
+    verdict = "REGRESSION" if change > threshold else "faster" if change < -threshold else ""
+    print(f"{line} {change:>+8.1%} {verdict}")
+    return verdict
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    # Prints each benchmark against the baseline; returns the regressed names
+    print(f"\nAgainst baseline from {baseline['meta']['date']} ({baseline['meta']['platform']}):")
+    regressions = []
+    for name, result in results.items():
+        if report(name, result, baseline['results'].get(name), threshold) == "REGRESSION":
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pod race benchmarks")
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this")
+    parser.add_argument('--repeats', type=int, help="override the number of timed repeats")
+    parser.add_argument('--save', metavar='FILE', help="write the results to FILE as a JSON baseline")
+    parser.add_argument('--compare', metavar='FILE', help="compare against a saved baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown fraction flagged as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.filter, args.repeats)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'meta': {
+                    'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'platform': platform.platform(),
+                    'python': platform.python_version(),
+                    'numpy': np.__version__,
+                },
+                'results': results,
+            }, f, indent=2)
+        print(f"Baseline written to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
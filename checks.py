@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import numpy as np
+
+# Agreement checks for the places where a faster path stands in for a
+# simpler one: each reproduces both with a fixed seed and compares them,
+# exactly or within a stated tolerance. They take seconds, not minutes.
+#
+#   python checks.py                  run everything
+#   python checks.py --filter replay  only checks matching "replay"
+
+CHECKS = {}
+
+def check(name):
+    # Registers `run() -> (passed, detail)` under `name`; detail says what
+    # was compared and how closely
+    def register(run):
+        CHECKS[name] = run
+        return run
+    return register
+
+def plain(data):
+    # As it comes back from JSON: tuples become lists
+    return json.loads(json.dumps(data))
+
+# Replays
+
+@check("replay/seek matches the live race")
+def replay_seek():
+    # A replay saved and loaded again, seeked forwards (stepping, onto and
+    # across keyframe ticks) and then backwards (restoring), must land on
+    # exactly the state the live race had at each tick
+    from race_core import Race
+    from replay import Replay, ReplayPlayer, load_replay
+    race = Race(10**6, ["Pod 1", "Pod 2", "Pod 3", "Pod 4"], 1200, 800, seed=7)
+    race.obstacle_spawn_rate = 0.2  # Plenty of obstacles to carry across keyframes
+    race.min_obstacle_spacing = 100
+    replay = race.subscribe(Replay.record(race, interval=50))
+    interval = replay.interval
+    ticks = sorted({1, 17} | {k * interval + d for k in (1, 2, 3) for d in (-1, 0, 1)})
+    live = {}
+    while race.ticks < ticks[-1]:
+        race.step()
+        if race.ticks in ticks:
+            live[race.ticks] = plain(race.snapshot())
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'replay.json')
+        replay.save(path)
+        player = ReplayPlayer(load_replay(path))
+    mismatched = [tick for tick in ticks + ticks[::-1] if plain(player.seek(tick).snapshot()) != live[tick]]
+
+    # Playing onto a keyframe tick keeps the obstacles the interpolator holds
+    obstacles = player.seek(2 * interval - 1).obstacles
+    kept = player.seek(2 * interval).obstacles is obstacles
+    detail = f"{len(ticks)} ticks each way, keyframes every {interval}"
+    if mismatched:
+        detail += f"; differs at {sorted(set(mismatched))}"
+    if not kept:
+        detail += "; stepping onto a keyframe rebuilt the obstacles"
+    return not mismatched and kept, detail
+
+# Random events
+
+EVENT_TRIALS = 10000
+EVENT_MEAN_TOLERANCE = 0.05  # Relative, on mean ticks to the first event (~3.5 standard errors)
+EVENT_SHARE_TOLERANCE = 0.02  # Absolute, on each event's share of first events (~3 standard errors)
+
+@check("events/scheduler matches per-tick rolls")
+def event_scheduler():
+    # EventScheduler draws when a racer's next event fires instead of
+    # rolling every event on every tick, as Race.step used to: ticks to the
+    # first event and which event it is must come out the same
+    import random
+    from race_core import EventScheduler, default_events
+    events = default_events()
+
+    rng = random.Random(18)
+    rolled = []  # (ticks to the first event, event index), rolling each tick
+    for _ in range(EVENT_TRIALS):
+        ticks = 0
+        fired = None
+        while fired is None:
+            ticks += 1
+            for i, event in enumerate(events):
+                if rng.random() < event.probability:
+                    fired = i
+                    break
+        rolled.append((ticks, fired))
+
+    scheduler = EventScheduler(events, random.Random(18))
+    scheduled = []
+    for _ in range(EVENT_TRIALS):
+        scheduler.schedule(0, 0)
+        tick = scheduler.heap[0][0]
+        scheduled.append((tick + 1, events.index(scheduler.due(tick)[0])))
+
+    means = [np.mean([ticks for ticks, _ in trials]) for trials in (rolled, scheduled)]
+    shares = [np.bincount([i for _, i in trials], minlength=len(events)) / EVENT_TRIALS
+              for trials in (rolled, scheduled)]
+    mean_error = abs(means[1] / means[0] - 1)
+    share_error = np.abs(shares[1] - shares[0]).max()
+    detail = (f"mean ticks {means[0]:.1f} rolled vs {means[1]:.1f} scheduled ({mean_error:.1%}, "
+              f"tolerance {EVENT_MEAN_TOLERANCE:.0%}); shares within {share_error:.3f} "
+              f"(tolerance {EVENT_SHARE_TOLERANCE}), {EVENT_TRIALS} trials")
+    return mean_error <= EVENT_MEAN_TOLERANCE and share_error <= EVENT_SHARE_TOLERANCE, detail
+
+# Odds
+
+ODDS_SPEEDS = [1.0, 0.95, 1.05, 1.0]  # Close enough that every pod wins some
+ODDS_DISTANCE = 5000
+ODDS_RACES = 3000  # Full Race runs; the simulated side uses ODDS_SIMULATIONS
+ODDS_SIMULATIONS = 100_000
+ODDS_TOLERANCE = 0.03  # Absolute, on each win share (over 3 standard errors of the Race side)
+
+@check("odds/simulate matches Race.run")
+def odds_agreement():
+    # Win shares (and races nobody won) from OddsEngine.simulate against
+    # the same racers run through Race.step
+    from odds import NO_WINNER, OddsEngine
+    from race_core import Race
+    names = [f"Pod {i + 1}" for i in range(len(ODDS_SPEEDS))]
+    outcomes = len(names) + 1  # Last: no winner
+
+    raced = np.zeros(outcomes)
+    for seed in range(ODDS_RACES):
+        race = Race(ODDS_DISTANCE, names, seed=seed)
+        for racer, speed in zip(race.racers, ODDS_SPEEDS):
+            racer.speed = speed
+        while not race.finished_racers and not race.is_race_finished():
+            race.step()
+        raced[race.racers.index(race.finished_racers[0]) if race.finished_racers else -1] += 1
+    raced /= ODDS_RACES
+
+    engine = OddsEngine.from_race(Race(ODDS_DISTANCE, names))
+    winners = engine.simulate(ODDS_SPEEDS, ODDS_SIMULATIONS, np.random.default_rng(4))
+    simulated = np.bincount(np.where(winners == NO_WINNER, len(names), winners), minlength=outcomes) / ODDS_SIMULATIONS
+
+    error = np.abs(simulated - raced).max()
+    detail = (f"win shares {np.round(raced, 3).tolist()} raced vs {np.round(simulated, 3).tolist()} "
+              f"simulated (last: no winner); within {error:.3f}, tolerance {ODDS_TOLERANCE}")
+    return error <= ODDS_TOLERANCE, detail
+
+# Batches
+
+@check("batch/worker count doesn't change results")
+def batch_workers():
+    # Every race is seeded from (seed, race index), so one worker and a
+    # pool of three must produce the same standings, character for character
+    from batch import run_batch
+    names = ["Pod 1", "Pod 2", "Pod 3", "Pod 4"]
+    tables = {workers: run_batch(60, workers, 5, 5000, names).table() for workers in (1, 3)}
+    return tables[1] == tables[3], "Standings.table() for 60 races, seed 5, 1 vs 3 workers"
+
+def run_checks(pattern=None):
+    # Prints a line per check; returns the names that failed
+    failures = []
+    for name, run in CHECKS.items():
+        if pattern and pattern not in name:
+            continue
+        try:
+            passed, detail = run()
+        except ImportError as e:
+            print(f"{name:<50} skipped ({e})")
+            continue
+        print(f"{name:<50} {'ok' if passed else 'FAILED':<7} {detail}")
+        if not passed:
+            failures.append(name)
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pod race agreement checks")
+    parser.add_argument('--filter', help="only run checks whose name contains this")
+    args = parser.parse_args(argv)
+
+    failures = run_checks(args.filter)
+    if failures:
+        print(f"{len(failures)} check(s) failed")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+# Swept collision tests between racers and obstacles. Within a tick both
+# move in a straight line along their lane, so the gap between them changes
+# linearly from its value at the start of the tick to its value at the end;
+# they touch if that range comes within the obstacle's size. Testing only
+# end-of-tick positions lets fast racers (or long ticks) skip straight over
+# an obstacle.
+#
+# An obstacle can only hit the racer in its own lane, and each obstacle
+# hits at most once, however many ticks the two stay in contact; callers
+# keep a per-obstacle "already hit" flag.
+
+def swept_overlap(start, end, size):
+    # Racer-minus-obstacle gap went from start to end over the tick: did it
+    # pass within size? Works on scalars and on numpy arrays alike
+    return ((start < size) | (end < size)) & ((start > -size) | (end > -size))
+
+def lane_hits(racer_from, racer_to, lanes, obstacle_to, speeds, sizes, hit=None):
+    # Vectorized over every obstacle in every lane at once. Racer i moved
+    # from racer_from[i] to racer_to[i] this tick; obstacle j, in lane
+    # lanes[j], moved left by speeds[j] to obstacle_to[j]. Returns the mask
+    # of obstacles making a new hit.
+    start = racer_from[lanes] - (obstacle_to + speeds)
+    end = racer_to[lanes] - obstacle_to
+    touched = swept_overlap(start, end, sizes)
+    return touched if hit is None else touched & ~hit
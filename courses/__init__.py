@@ -0,0 +1,45 @@
+import glob
+import os
+from courses.course import Course
+
+# Course registry. Every *.json file in this directory is a course named
+# after the file:
+#
+#   {
+#     "title": "Default",
+#     "width": 50,                                  track width in pixels
+#     "color": "gray",
+#     "start": {"x": 0, "y": 350, "heading": 0},    turtle coordinates/degrees
+#     "finish": null,                               arc length, null = the end
+#     "segments": [
+#       {"straight": 300},
+#       {"arc": {"length": 300, "turn": 150, "steps": 30}}
+#     ]
+#   }
+#
+# Arcs turn `turn` degrees (positive is right) over `length` pixels, drawn
+# as `steps` equal chords. Files are only read when a course is asked for,
+# and compiled geometry is cached on disk (see courses.course).
+
+COURSE_DIR = os.path.dirname(__file__)
+
+_paths = None
+_loaded = {}
+
+def _discover():
+    global _paths
+    if _paths is None:
+        _paths = {os.path.splitext(os.path.basename(path))[0]: path
+                  for path in glob.glob(os.path.join(COURSE_DIR, '*.json'))}
+    return _paths
+
+def names():
+    return sorted(_discover())
+
+def get(name):
+    if name not in _loaded:
+        paths = _discover()
+        if name not in paths:
+            raise KeyError(f"No course named {name!r} (have: {', '.join(sorted(paths))})")
+        _loaded[name] = Course.load(paths[name])
+    return _loaded[name]
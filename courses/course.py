@@ -0,0 +1,128 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from courses.geometry import VERSION, BAND, compile_commands, CourseGeometry
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache', f"v{VERSION}")
+FIELDS = ('points', 'sdf', 'progress', 'lateral')
+
+class Course:
+    # One course file: segments, track width, start pose and finish line
+    def __init__(self, name, definition):
+        self.name = name
+        self.definition = definition
+        self.title = definition.get('title', name)
+        self.width = definition['width']
+        start = definition.get('start', {})
+        self.start = (start.get('x', 0), start.get('y', 0))
+        self.heading = start.get('heading', 0)
+        self.color = definition.get('color', 'gray')
+        self.segments = definition['segments']
+        self.finish = definition.get('finish')  # Arc length; None is the end of the course
+        self._geometry = {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            definition = json.load(f)
+        return cls(os.path.splitext(os.path.basename(path))[0], definition)
+
+    def commands(self):
+        # Segments as (repeats, step, turn) turtle commands
+        commands = []
+        for segment in self.segments:
+            if 'straight' in segment:
+                commands.append((1, segment['straight'], 0))
+            elif 'arc' in segment:
+                arc = segment['arc']
+                steps = arc.get('steps') or max(1, round(abs(arc['turn']) / 5))
+                commands.append((steps, arc['length'] / steps, arc['turn'] / steps))
+            else:
+                raise ValueError(f"{self.name}: unknown segment {segment!r}")
+        return commands
+
+    def key(self, grid_height, grid_width):
+        # Everything the compiled geometry depends on
+        spec = json.dumps([self.definition, grid_height, grid_width, BAND], sort_keys=True)
+        return hashlib.sha1(spec.encode()).hexdigest()[:16]
+
+    def compile(self, grid_height=1080, grid_width=1920):
+        points = compile_commands(self.commands(), self.start, self.heading)
+        return CourseGeometry.compile(points, self.width, grid_height, grid_width)
+
+    def geometry(self, grid_height=1080, grid_width=1920):
+        # Compiled geometry, from memory, the on-disk cache or compiled now
+        size = (grid_height, grid_width)
+        if size not in self._geometry:
+            path = os.path.join(CACHE_DIR, f"{self.name}-{self.key(*size)}")
+            geometry = load_geometry(path, self.width)
+            if geometry is None:
+                geometry = self.compile(*size)
+                save_geometry(path, geometry)
+            self._geometry[size] = geometry
+        return self._geometry[size]
+
+    def finish_progress(self, geometry):
+        return geometry.length if self.finish is None else self.finish
+
+    def draw(self, pen, grid_height=1080, grid_width=1920):
+        # The whole centerline as one stroke plus the finish line; keep the
+        # screen's tracer off and update once afterwards
+        geometry = self.geometry(grid_height, grid_width)
+        (x, y), points = geometry.points[0], geometry.points[1:]
+        pen.penup()
+        pen.goto(x, y)
+        pen.color(self.color)
+        pen.width(self.width)
+        pen.pendown()
+        for x, y in points.tolist():
+            pen.goto(x, y)
+
+        s = self.finish_progress(geometry)
+        x, y = geometry.position_at(s)
+        normal = np.radians(geometry.heading_at(s) + 90)
+        dx, dy = np.cos(normal) * self.width / 2, np.sin(normal) * self.width / 2
+        pen.penup()
+        pen.goto(float(x + dx), float(y + dy))
+        pen.color('white')
+        pen.width(4)
+        pen.pendown()
+        pen.goto(float(x - dx), float(y - dy))
+        pen.penup()
+        pen.hideturtle()
+
+def load_geometry(path, track_width):
+    # Fields are memory-mapped, so loading costs next to nothing
+    try:
+        arrays = [np.load(os.path.join(path, f"{field}.npy"), mmap_mode='r') for field in FIELDS]
+    except (OSError, ValueError):
+        return None
+    points, sdf, progress, lateral = arrays
+    return CourseGeometry(points, track_width, sdf, progress, lateral)
+
+def save_geometry(path, geometry):
+    # Written to a scratch directory and renamed into place, so a crash or a
+    # second process never leaves a half-written entry behind. Then older
+    # entries for the same course, and caches of older VERSIONs, are removed.
+    scratch = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        scratch = tempfile.mkdtemp(dir=CACHE_DIR)
+        for field in FIELDS:
+            np.save(os.path.join(scratch, f"{field}.npy"), getattr(geometry, field))
+        shutil.rmtree(path, ignore_errors=True)  # Left over and unreadable, or load_geometry wouldn't have failed
+        os.replace(scratch, path)
+    except OSError:  # Read-only install, or another process got there first
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+        return
+    name = os.path.basename(path).rsplit('-', 1)[0]
+    stale = glob.glob(os.path.join(CACHE_DIR, f"{glob.escape(name)}-{'[0-9a-f]' * 16}"))
+    stale += glob.glob(os.path.join(os.path.dirname(CACHE_DIR), 'v[0-9]*'))
+    for entry in stale:
+        if entry not in (path, CACHE_DIR):
+            shutil.rmtree(entry, ignore_errors=True)
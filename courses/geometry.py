@@ -0,0 +1,158 @@
+import math
+import numpy as np
+
+# Compiled course geometry. A course's forward/right/left commands are run
+# without a turtle into an arc-length parametrized centerline, then every
+# grid cell near the track gets:
+#   sdf       signed distance to the track edge (negative on the track)
+#   progress  arc length of the nearest centerline point
+#   lateral   signed offset from the centerline (positive to the left)
+# so racers can find where they are and which way to steer from array
+# lookups. Grids are indexed [row, col] with turtle (0, 0) at the centre
+# and y up, the same layout as the turtle canvas.
+
+BAND = 100  # Fields are exact within this many pixels of the track edge
+VERSION = 1  # Bump when the compiled output changes, so cached geometry is rebuilt
+
+def compile_commands(track, start=(0.0, 0.0), heading=0.0):
+    # Centerline vertices of (repeats, step, turn) segments, exactly as a
+    # turtle would walk them (turn > 0 is right, turtle headings in degrees)
+    x, y = start
+    points = [(x, y)]
+    for repeats, step, turn in track:
+        for _ in range(repeats):
+            angle = math.radians(heading)
+            x += step * math.cos(angle)
+            y += step * math.sin(angle)
+            points.append((x, y))
+            heading -= turn
+    return np.array(points)
+
+class CourseGeometry:
+    def __init__(self, points, track_width, sdf, progress, lateral, band=BAND):
+        # Use compile() to build the fields; this takes them ready-made
+        self.points = np.asarray(points, dtype=float)
+        self.track_width = track_width
+        self.band = band
+        self.sdf = sdf
+        self.progress = progress
+        self.lateral = lateral
+
+        deltas = np.diff(self.points, axis=0)
+        self.segment_lengths = np.hypot(deltas[:, 0], deltas[:, 1])
+        self.arc_length = np.concatenate(([0.0], np.cumsum(self.segment_lengths)))
+        self.length = self.arc_length[-1]
+        self.headings = np.degrees(np.arctan2(deltas[:, 1], deltas[:, 0]))  # Per segment
+        # The end meets the start within the track, so progress wraps around
+        self.closed = bool(np.hypot(*(self.points[-1] - self.points[0])) < track_width)
+
+    @classmethod
+    def compile(cls, points, track_width, grid_height=1080, grid_width=1920, band=BAND):
+        geometry = cls(points, track_width,
+                       np.full((grid_height, grid_width), np.float32(track_width / 2 + band)),
+                       np.zeros((grid_height, grid_width), dtype=np.float32),
+                       np.zeros((grid_height, grid_width), dtype=np.float32),
+                       band)
+        geometry.build_fields()
+        return geometry
+
+    def build_fields(self):
+        # Nearest segment per cell, one segment's neighbourhood at a time
+        height, width = self.sdf.shape
+        reach = self.track_width / 2 + self.band
+        distance = np.full(self.sdf.shape, np.inf)
+        for i, ((x0, y0), (x1, y1)) in enumerate(zip(self.points, self.points[1:])):
+            length = self.segment_lengths[i]
+            if not length:
+                continue
+            cols = np.arange(max(int(min(x0, x1) - reach + width / 2), 0),
+                             min(int(max(x0, x1) + reach + width / 2) + 1, width))
+            rows = np.arange(max(int(height / 2 - max(y0, y1) - reach), 0),
+                             min(int(height / 2 - min(y0, y1) + reach) + 1, height))
+            if not len(cols) or not len(rows):
+                continue
+            window = np.s_[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+            px = cols + 0.5 - width / 2 - x0
+            py = height / 2 - rows[:, None] - 0.5 - y0
+            ux, uy = (x1 - x0) / length, (y1 - y0) / length
+            along = np.clip(px * ux + py * uy, 0, length)
+            d = np.hypot(px - along * ux, py - along * uy)
+            closer = d < distance[window]
+            distance[window] = np.where(closer, d, distance[window])
+            self.progress[window] = np.where(closer, self.arc_length[i] + along, self.progress[window])
+            self.lateral[window] = np.where(closer, ux * py - uy * px, self.lateral[window])
+        self.sdf[:] = np.minimum(distance, reach) - self.track_width / 2
+
+    def cells(self, x, y):
+        # Grid (row, col) for turtle coordinates, clamped to the grid
+        height, width = self.sdf.shape
+        row = np.clip(np.floor(height / 2 - np.asarray(y)).astype(int), 0, height - 1)
+        col = np.clip(np.floor(width / 2 + np.asarray(x)).astype(int), 0, width - 1)
+        return row, col
+
+    # Lookups take scalars or arrays of turtle coordinates
+
+    def distance_at(self, x, y):
+        return self.sdf[self.cells(x, y)]
+
+    def progress_at(self, x, y):
+        return self.progress[self.cells(x, y)]
+
+    def lateral_at(self, x, y):
+        return self.lateral[self.cells(x, y)]
+
+    def gradient_at(self, x, y):
+        # Direction of increasing distance from the track (turtle axes);
+        # steering along its negative heads back towards the centerline
+        row, col = self.cells(x, y)
+        height, width = self.sdf.shape
+        gx = (self.sdf[row, np.minimum(col + 1, width - 1)] - self.sdf[row, np.maximum(col - 1, 0)]) / 2
+        gy = (self.sdf[np.maximum(row - 1, 0), col] - self.sdf[np.minimum(row + 1, height - 1), col]) / 2
+        return gx, gy
+
+    def local_progress_at(self, x, y, near, window):
+        # Arc length of the nearest centerline point within `window` of
+        # `near` (per point). Where the course crosses itself the nearest
+        # point overall can be on the other branch; a racer tracked from
+        # its previous progress stays on its own.
+        x, y, near = (np.atleast_1d(np.asarray(a, dtype=float))[:, None] for a in (x, y, near))
+        start, lengths = self.arc_length[:-1], self.segment_lengths
+        # Where each segment starts relative to the window's low end
+        rel = start - (near - window)
+        if self.closed:
+            rel = np.mod(rel, self.length)
+            rel = np.where(rel + lengths > self.length, rel - self.length, rel)
+        # The part of each segment inside the window, nearest point within it
+        low = np.clip(-rel, 0, lengths)
+        high = np.clip(2 * window - rel, 0, lengths)
+        (x0, y0), (x1, y1) = self.points[:-1].T, self.points[1:].T
+        ux = np.divide(x1 - x0, lengths, out=np.zeros_like(lengths), where=lengths > 0)
+        uy = np.divide(y1 - y0, lengths, out=np.zeros_like(lengths), where=lengths > 0)
+        along = np.clip((x - x0) * ux + (y - y0) * uy, low, high)
+        d = np.hypot(x - x0 - along * ux, y - y0 - along * uy)
+        d[np.broadcast_to(high <= low, d.shape)] = np.inf
+        nearest = np.argmin(d, axis=1)
+        rows = np.arange(len(nearest))
+        return self.wrap(start[nearest] + along[rows, nearest])
+
+    def lateral_from(self, x, y, s):
+        # Signed offset (positive to the left) from the centerline point at
+        # arc length s, across the track direction there
+        cx, cy = self.position_at(s)
+        angle = np.radians(self.heading_at(s))
+        return np.cos(angle) * (np.asarray(y) - cy) - np.sin(angle) * (np.asarray(x) - cx)
+
+    def wrap(self, s):
+        s = np.asarray(s, dtype=float)
+        return np.mod(s, self.length) if self.closed else np.clip(s, 0, self.length)
+
+    def position_at(self, s):
+        # Centerline point (x, y) at arc length s
+        s = self.wrap(s)
+        return np.interp(s, self.arc_length, self.points[:, 0]), np.interp(s, self.arc_length, self.points[:, 1])
+
+    def heading_at(self, s):
+        # Track direction (turtle degrees) at arc length s
+        s = self.wrap(s)
+        segment = np.clip(np.searchsorted(self.arc_length, s, side='right') - 1, 0, len(self.headings) - 1)
+        return self.headings[segment]
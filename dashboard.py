@@ -0,0 +1,69 @@
+import shutil
+import sys
+import time
+from race_core import RaceListener
+
+# Race status for the terminal, redrawn in place with ANSI escapes at most
+# `rate` times a second. Each refresh is one write and one flush, and
+# nothing is written at all when stdout isn't a terminal (journald, a
+# serial console, a pipe), so the frame loop never waits on it.
+
+STATUS_RATE = 4.0  # Dashboard refreshes per second
+BAR_WIDTH = 20
+
+class TerminalDashboard(RaceListener):
+    def __init__(self, stream=None, rate=STATUS_RATE, clock=time.perf_counter):
+        self.stream = stream or sys.stdout
+        self.interval = 1 / rate if rate > 0 else None
+        self.enabled = self.interval is not None and self.stream.isatty()
+        self.clock = clock
+        self.refreshed = None  # Clock time of the last refresh
+        self.lines = 0  # Lines drawn last time, moved back over on the next
+
+    def race_tick(self, race):
+        if not self.enabled:
+            return
+        now = self.clock()
+        if self.refreshed is not None and now - self.refreshed < self.interval:
+            return
+        self.refreshed = now
+        self.refresh(race)
+
+    def refresh(self, race):
+        # Draw now, whatever the rate; also used for the final standings
+        if not self.enabled:
+            return
+        columns, rows = shutil.get_terminal_size()
+        lines = status_lines(race, max(rows - 1, 3))
+        out = [f"\x1b[{self.lines}A\r"] if self.lines else []  # Back to the top of the last dashboard
+        out += [f"{line[:columns]}\x1b[K\n" for line in lines]  # Each line clears what it overwrote
+        if len(lines) < self.lines:
+            out.append("\x1b[J")  # Dashboard got shorter: clear the rest
+        self.stream.write("".join(out))
+        self.stream.flush()
+        self.lines = len(lines)
+
+def status_lines(race, rows):
+    # Header plus one progress line per racer, as many as fit in `rows`;
+    # big fields show the leaders
+    racers = race.racers
+    shown = rows - 2
+    if len(racers) > shown:
+        shown -= 1  # Room for the "more" line
+        racers = sorted(racers, key=lambda racer: racer.position, reverse=True)[:shown]
+    lines = [f"Tick {race.ticks}  finished {len(race.finished_racers)}/{len(race.racers)}",
+             "=" * 50]
+    for racer in racers:
+        progress = int((racer.position / race.distance) * BAR_WIDTH)
+        if racer.destroyed:
+            state = " DESTROYED"
+        elif racer.finished:
+            state = " FINISHED"
+        elif racer.active_event:
+            state = f" [{racer.active_event.name}]"
+        else:
+            state = ""
+        lines.append(f"{racer.name}: {'#' * progress}{'-' * (BAR_WIDTH - progress)} {racer.position:.1f}m{state}")
+    if len(racers) < len(race.racers):
+        lines.append(f"... {len(race.racers) - len(racers)} more")
+    return lines
@@ -0,0 +1,90 @@
+import time
+
+# Fixed-timestep race loop for Tk. The simulation advances in whole ticks
+# of TICK_SECONDS measured on a monotonic clock, however long drawing takes;
+# frames are drawn between ticks with interpolated positions.
+
+TICK_SECONDS = 0.02
+
+class Interpolator:
+    # Positions from just before the latest tick, for drawing between ticks
+    def __init__(self):
+        self.racers = []
+        self.obstacles = {}
+
+    def capture(self, race):
+        self.racers = [(racer.position, racer.y_offset) for racer in race.racers]
+        self.obstacles = {obs: obs.x_pos for obs in race.obstacles}
+
+    def racer(self, index, racer, alpha):
+        if index >= len(self.racers):
+            return racer.position, racer.y_offset
+        position, y_offset = self.racers[index]
+        return (position + (racer.position - position) * alpha,
+                y_offset + (racer.y_offset - y_offset) * alpha)
+
+    def obstacle_x(self, obstacle, alpha):
+        x_pos = self.obstacles.get(obstacle)
+        if x_pos is None:  # Spawned on the latest tick
+            return obstacle.x_pos
+        return x_pos + (obstacle.x_pos - x_pos) * alpha
+
+class FixedStepLoop:
+    def __init__(self, root, race, step, render, on_finished=None, tick_seconds=TICK_SECONDS,
+                 max_steps_per_frame=8, max_skipped_frames=4, max_backlog=1.0, clock=time.perf_counter):
+        self.root = root
+        self.race = race
+        self.step = step  # Advances the race by exactly one tick
+        self.render = render  # render(interpolator, alpha)
+        self.on_finished = on_finished
+        self.tick_seconds = tick_seconds
+        self.max_steps_per_frame = max_steps_per_frame
+        self.max_skipped_frames = max_skipped_frames
+        # A longer stall than this (window dragged, machine suspended) is
+        # dropped instead of being replayed at full speed
+        self.max_backlog = max_backlog
+        self.clock = clock
+        self.interpolator = Interpolator()
+        self.accumulator = 0.0
+        self.last_time = None
+        self.skipped_frames = 0
+        self.ticks = 0
+        self.frames = 0
+
+    def start(self):
+        self.last_time = self.clock()
+        self.interpolator.capture(self.race)
+        self.root.after(0, self.frame)
+
+    def frame(self):
+        now = self.clock()
+        self.accumulator = min(self.accumulator + now - self.last_time, self.max_backlog)
+        self.last_time = now
+
+        # Catch up on as many ticks as real time requires (bounded per frame;
+        # the rest of the backlog carries over to the next frame)
+        steps = 0
+        while self.accumulator >= self.tick_seconds and steps < self.max_steps_per_frame:
+            if self.accumulator < 2 * self.tick_seconds or steps == self.max_steps_per_frame - 1:
+                self.interpolator.capture(self.race)  # Last tick this frame
+            self.step()
+            self.accumulator -= self.tick_seconds
+            self.ticks += 1
+            steps += 1
+            if self.race.is_race_finished():
+                if self.on_finished:
+                    self.on_finished()
+                return
+
+        # Still behind: skip drawing (up to a point) so the simulation keeps time
+        behind = self.accumulator >= self.tick_seconds
+        if behind and self.skipped_frames < self.max_skipped_frames:
+            self.skipped_frames += 1
+        else:
+            self.skipped_frames = 0
+            self.render(self.interpolator, min(self.accumulator / self.tick_seconds, 1.0))
+            self.frames += 1
+
+        # Wake up for the next tick; lateness is absorbed by the accumulator
+        delay = max(self.tick_seconds - self.accumulator, 0.0)
+        self.root.after(max(int(delay * 1000), 1) if not behind else 1, self.frame)
@@ -0,0 +1,44 @@
+import numpy as np
+
+# Static background layers (dunes, lane lines, finish markers) rendered
+# once into an image per (width, height, lanes) instead of being rebuilt
+# from canvas primitives for every frame and screen.
+
+class Layer:
+    def __init__(self, pixels, overlay):
+        # pixels: the whole composited layer, (height, width, 3) uint8.
+        # overlay: pixels that must stay above the drifting sand (lanes,
+        # finish markers); stamp() puts them back after the sand is drawn.
+        self.pixels = pixels
+        self.overlay = np.flatnonzero(overlay)
+        self.stamps = {}  # First row -> (flat indices, colors) for that sub-frame
+
+    def stamp(self, frame, top=0):
+        # Redraw the overlay onto `frame`, a copy of this layer's rows from
+        # `top` down. Pixels are handled as 3-byte items, which indexes a lot
+        # faster than (n, 3) rows.
+        if top not in self.stamps:
+            width = self.pixels.shape[1]
+            index = self.overlay[self.overlay >= top * width] - top * width
+            index = index[index < frame.shape[0] * width]
+            self.stamps[top] = (index, pixel_items(self.pixels[top:])[index])
+        index, colors = self.stamps[top]
+        np.put(pixel_items(frame), index, colors)
+        return frame
+
+def pixel_items(frame):
+    # Flat view of a contiguous (height, width, 3) uint8 frame, one item per pixel
+    return frame.view('V3').reshape(-1)
+
+class LayerCache:
+    # Keeps the latest rendering of each named layer until its size or lane
+    # count changes
+    def __init__(self):
+        self.layers = {}  # name -> ((width, height, lanes), Layer)
+
+    def get(self, name, width, height, lanes, render):
+        key = (width, height, lanes)
+        cached = self.layers.get(name)
+        if cached is None or cached[0] != key:
+            cached = self.layers[name] = (key, render(width, height, lanes))
+        return cached[1]
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+import queue
+import numpy as np
+from race_core import RaceListener
+
+# Live win probabilities during a race. Every LIVE_ODDS_TICKS ticks the
+# race's current state (OddsEngine.start_from) goes to a worker process,
+# which simulates the rest of the race many times over from it and sends
+# the probabilities back. The Tk loop only ever makes non-blocking queue
+# calls: race_tick() posts snapshots and poll() picks up whatever has
+# arrived. The worker always skips to the newest snapshot waiting, and
+# results older than the ones shown are dropped, so a slow machine just
+# gets fewer updates.
+#
+# The worker is spawned rather than forked: the window process has Tk and
+# other threads running by the time the race starts.
+
+LIVE_ODDS_TICKS = 50  # One estimate per second of racing
+LIVE_ODDS_SIMULATIONS = 2000  # Simulated races per estimate with four racers
+
+def odds_worker(engine, requests, results):
+    if hasattr(os, 'nice'):
+        os.nice(10)  # On machines short of cores, frames come first
+    rng = np.random.default_rng()
+    while True:
+        request = requests.get()
+        try:
+            while request is not None:  # Skip to the newest snapshot
+                request = requests.get_nowait()
+        except queue.Empty:
+            pass
+        if request is None:
+            return
+        tick, start, simulations = request
+        winners = engine.simulate(start.speed, simulations, rng, start)
+        counts = np.bincount(winners[winners >= 0], minlength=len(start.speed))
+        results.put((tick, counts / simulations))
+
+class LiveOdds(RaceListener):
+    def __init__(self, engine, racers, every=LIVE_ODDS_TICKS):
+        self.engine = engine
+        self.every = every
+        # Same number of simulated racers whatever the field size
+        self.simulations = max(200, LIVE_ODDS_SIMULATIONS * 4 // max(racers, 1))
+        self.probabilities = None  # Latest estimate, one per racer
+        self.tick = -1  # Race tick the estimate was made at
+        context = multiprocessing.get_context('spawn')
+        self.requests = context.Queue()
+        self.results = context.Queue()
+        self.worker = context.Process(target=odds_worker, args=(engine, self.requests, self.results),
+                                      daemon=True)
+        self.worker.start()
+
+    def race_tick(self, race):
+        if race.ticks % self.every:
+            return
+        if race.finished_racers:  # Decided
+            self.probabilities = np.array([racer is race.finished_racers[0] for racer in race.racers], dtype=float)
+            self.tick = race.ticks
+            return
+        self.requests.put((race.ticks, self.engine.start_from(race), self.simulations))
+
+    def poll(self):
+        # Latest probabilities (None until the first estimate arrives)
+        try:
+            while True:
+                tick, probabilities = self.results.get_nowait()
+                if tick > self.tick:  # Anything older than what's shown is stale
+                    self.tick, self.probabilities = tick, probabilities
+        except queue.Empty:
+            pass
+        return self.probabilities
+
+    def close(self):
+        if self.worker.is_alive():
+            self.requests.put(None)
+            self.worker.join(timeout=1)
+            if self.worker.is_alive():  # Mid-estimate; it's only arithmetic
+                self.worker.terminate()
@@ -0,0 +1,264 @@
+import numpy as np
+from race_core import OBSTACLE_SIZE, OBSTACLE_SPEED, default_events
+from collision import swept_overlap
+
+# Monte Carlo odds: simulate many complete races at once with the same
+# movement, event and collision rules as Race.step. State is held in
+# (races, racers) arrays, one row per simulated race and one column per racer.
+#
+# Two properties of Race.step keep this cheap:
+# - obstacles only ever hit the racer in their own lane, and consecutive
+#   obstacles in a lane are at least min_obstacle_spacing apart, so a racer
+#   can only interact with the oldest obstacle it hasn't passed yet. Each
+#   lane keeps a small ring of obstacle spawn ticks plus a head pointer.
+# - per-tick event rolls are a geometric process, so each racer carries the
+#   tick of its next event instead of rolling dice every tick.
+#
+# Simulations normally start from the grid; passing a RaceStart (see
+# OddsEngine.start_from) carries on from a race part-way through instead.
+
+NO_WINNER = -1
+
+class Odds:
+    def __init__(self, racers, winners):
+        self.racers = racers
+        self.simulations = len(winners)
+        counts = np.bincount(winners[winners >= 0], minlength=len(racers))
+        self.probabilities = counts / max(self.simulations, 1)
+        self.no_winner = float(np.mean(winners == NO_WINNER)) if self.simulations else 0.0
+
+    def win_probability(self, index):
+        return float(self.probabilities[index])
+
+    def fair_odds(self, index):
+        # Fractional odds against, e.g. 3.0 means 3:1; None when never won
+        p = self.probabilities[index]
+        if p <= 0:
+            return None
+        return float((1 - p) / p)
+
+class RaceStart:
+    # A race part-way through, as simulate() needs it: per-racer arrays,
+    # plus per lane the obstacles the racer has still to pass (oldest first)
+    # as (spawn tick, already hit) and the spawn tick of the newest one.
+    # Spawn ticks count from now, so they are 0 or less.
+    def __init__(self, position, speed, alive, event_left, event_modifier, obstacles, last_spawn):
+        self.position = position
+        self.speed = speed  # Current speeds, collision slowdowns included
+        self.alive = alive  # Not destroyed or finished
+        self.event_left = event_left  # Ticks left of the active event, 0 for none
+        self.event_modifier = event_modifier
+        self.obstacles = obstacles
+        self.last_spawn = last_spawn
+
+class OddsEngine:
+    def __init__(self, distance, width=1920, events=None, obstacle_spawn_rate=0.015,
+                 min_obstacle_spacing=300, max_ticks=20000, compact_every=32):
+        self.distance = distance
+        self.width = width
+        self.events = events if events is not None else default_events()
+        self.obstacle_spawn_rate = obstacle_spawn_rate
+        self.min_obstacle_spacing = min_obstacle_spacing
+        # Races still undecided after max_ticks count as having no winner;
+        # racers that can no longer reach the line before then are dropped
+        self.max_ticks = max_ticks
+        self.compact_every = compact_every
+
+        probabilities = np.array([e.probability for e in self.events])
+        # Race.step rolls the events in order and applies the first success
+        survive = np.concatenate(([1.0], np.cumprod(1 - probabilities)[:-1]))
+        self.any_event = 1 - np.prod(1 - probabilities)
+        self.event_choice = probabilities * survive / self.any_event
+        self.event_duration = np.array([e.duration for e in self.events])
+        self.event_modifier = np.array([e.speed_modifier for e in self.events], dtype=float)
+        self.event_lethal = np.array([e.lethal for e in self.events])
+
+    @classmethod
+    def from_race(cls, race, **kwargs):
+        return cls(race.distance, race.width, race.events, race.obstacle_spawn_rate,
+                   race.min_obstacle_spacing, **kwargs)
+
+    def start_from(self, race):
+        # RaceStart for simulating on from the race's current tick. Events
+        # yet to come are drawn afresh; the race's own schedule isn't used.
+        racers = race.racers
+        scale = (self.width - 100) / self.distance
+        never = -int(np.ceil(self.min_obstacle_spacing / OBSTACLE_SPEED))
+        obstacles, last_spawn = [], []
+        for lane, racer in enumerate(racers):
+            # Obstacle at x spawned (x - width) / speed + 1 ticks from now
+            racer_x = racer.position * scale
+            bucket = race.obstacles.buckets[lane]
+            obstacles.append([(round((obs.x_pos - self.width) / OBSTACLE_SPEED) + 1, obs.hit)
+                              for obs in bucket if racer_x - obs.x_pos < obs.size])
+            last_spawn.append(round((bucket[-1].x_pos - self.width) / OBSTACLE_SPEED) + 1 if bucket else never)
+        return RaceStart(
+            np.array([racer.position for racer in racers], dtype=float),
+            np.array([racer.speed for racer in racers], dtype=float),
+            np.array([not racer.finished and not racer.destroyed for racer in racers]),
+            np.array([racer.event_duration if racer.active_event else 0 for racer in racers]),
+            np.array([racer.active_event.speed_modifier if racer.active_event else 1.0 for racer in racers]),
+            obstacles, last_spawn)
+
+    def odds(self, racers, simulations=100_000, rng=None):
+        winners = self.simulate([racer.speed for racer in racers], simulations, rng)
+        return Odds(racers, winners)
+
+    def simulate(self, speeds, simulations, rng=None, start=None):
+        # Returns the winning racer index per simulated race (NO_WINNER if
+        # every racer was destroyed or stalled). With a RaceStart, `speeds`
+        # should be start.speed.
+        rng = rng if rng is not None else np.random.default_rng()
+        n_racers = len(speeds)
+        winners = np.full(simulations, NO_WINNER, dtype=np.int64)
+        if simulations == 0 or n_racers == 0:
+            return winners
+
+        never = np.iinfo(np.int32).max
+        scale = (self.width - 100) / self.distance  # metres -> screen pixels
+        size = OBSTACLE_SIZE / scale  # Obstacle size in metres
+        approach = OBSTACLE_SPEED / scale  # Obstacle speed in metres per tick
+        spacing_ticks = int(np.ceil(self.min_obstacle_spacing / OBSTACLE_SPEED))
+        ring_size = int(np.ceil((self.width + OBSTACLE_SIZE) / self.min_obstacle_spacing)) + 2
+
+        # An obstacle spawned on tick s sits at anchor - approach * t metres on
+        # tick t, so racer/obstacle offsets only need `position - anchor`.
+        def anchor(spawned):
+            return (self.width + OBSTACLE_SPEED * (spawned - 1)) / scale
+
+        # Racers that can no longer win (destroyed or stalled) are made inert
+        # rather than masked: zero velocity, no obstacle ahead and nothing due.
+        shape = (simulations, n_racers)
+        rows = np.arange(simulations)  # Original index of every live row
+        position = np.zeros(shape)
+        speed = np.empty(shape)
+        speed[:] = speeds
+        velocity = speed * 20  # speed * 20 * event modifier
+        alive = np.ones(shape, dtype=bool)
+        in_event = np.zeros(shape, dtype=bool)
+        due = rng.geometric(self.any_event, shape).astype(np.int32)  # Next event, or end of the current one
+        head_anchor = np.full(shape, np.inf)  # Oldest obstacle not yet passed
+        head_hit = np.zeros(shape, dtype=bool)  # It has already hit
+        last_spawn = np.full(shape, -spacing_ticks, dtype=np.int64)
+        ring = np.zeros(shape + (ring_size,), dtype=np.int64)
+        head = np.zeros(shape, dtype=np.int64)
+        tail = np.zeros(shape, dtype=np.int64)
+        noise = np.empty(shape)
+        offset = np.empty(shape)
+
+        def kill(index):
+            alive[index] = False
+            velocity[index] = 0
+            head_anchor[index] = np.inf
+            due[index] = never
+
+        if start is not None:  # Every simulated race starts from the same state
+            position[:] = start.position
+            busy = start.event_left > 0
+            in_event[:, busy] = True
+            due[:, busy] = start.event_left[busy]
+            velocity[:, busy] *= start.event_modifier[busy]
+            for lane, obstacles in enumerate(start.obstacles):
+                obstacles = obstacles[:ring_size]
+                for i, (spawned, _) in enumerate(obstacles):
+                    ring[:, lane, i] = spawned
+                tail[:, lane] = len(obstacles)
+                if obstacles:
+                    head_anchor[:, lane] = anchor(obstacles[0][0])
+                    head_hit[:, lane] = obstacles[0][1]
+            last_spawn[:] = start.last_spawn
+            kill((slice(None), ~start.alive))
+
+        def slow_down(hit):
+            speed.flat[hit] *= 0.8
+            velocity.flat[hit] *= 0.8
+
+        for tick in range(1, self.max_ticks + 1):
+            n = len(rows)
+
+            # Spawn: each race rolls once per tick, then picks a lane uniformly
+            spawning = rng.choice(n, rng.binomial(n, self.obstacle_spawn_rate), replace=False)
+            if len(spawning):
+                lanes = rng.integers(0, n_racers, len(spawning))
+                ok = tick - last_spawn[spawning, lanes] >= spacing_ticks
+                spawning, lanes = spawning[ok], lanes[ok]
+                last_spawn[spawning, lanes] = tick
+                ring[spawning, lanes, tail[spawning, lanes] % ring_size] = tick
+                first = (head[spawning, lanes] == tail[spawning, lanes]) & alive[spawning, lanes]
+                head_anchor[spawning[first], lanes[first]] = anchor(tick)
+                tail[spawning, lanes] += 1
+
+            # Events: the tick an event ends the racer rolls again
+            changing = np.flatnonzero(due == tick)
+            if len(changing):
+                ending = changing[in_event.flat[changing]]
+                if len(ending):
+                    in_event.flat[ending] = False
+                    velocity.flat[ending] = speed.flat[ending] * 20
+                    due.flat[ending] = tick + rng.geometric(self.any_event, len(ending)) - 1
+                firing = changing[due.flat[changing] == tick]
+                if len(firing):
+                    chosen = rng.choice(len(self.events), len(firing), p=self.event_choice)
+                    in_event.flat[firing] = True
+                    due.flat[firing] = tick + self.event_duration[chosen]
+                    velocity.flat[firing] = speed.flat[firing] * 20 * self.event_modifier[chosen]
+                    lethal = firing[self.event_lethal[chosen]]
+                    if len(lethal):
+                        kill(np.unravel_index(lethal, shape))
+
+            # Movement: uniform(1, 2) * speed * 20 * modifier
+            rng.random(out=noise)
+            noise += 1
+            noise *= velocity
+            position += noise
+
+            if position.max() >= self.distance:
+                # Racers update in list order, so the lowest index crosses
+                # first; flatnonzero is row-major, so that is the first hit
+                # of each row
+                r, c = np.unravel_index(np.flatnonzero(position >= self.distance), shape)
+                won, first = np.unique(r, return_index=True)
+                winners[rows[won]] = c[first]
+                kill(won)
+                position[won] = 0  # Decided; keep them out of the max() check
+
+            # Obstacle hits, swept over the tick: the racer moved by `noise`
+            # while the obstacle came `approach` closer, and each obstacle
+            # hits once. Once passed, the next obstacle in the lane is up.
+            np.subtract(position, head_anchor, out=offset)
+            near = offset > -size - approach * tick
+            if near.any():
+                near = np.flatnonzero(near)
+                end = offset.flat[near] + approach * tick
+                begin = end - noise.flat[near] - approach
+                hit = near[swept_overlap(begin, end, size) & ~head_hit.flat[near]]
+                slow_down(hit)
+                head_hit.flat[hit] = True
+
+                passed = near[end >= size]
+                if len(passed):
+                    r, c = np.unravel_index(passed, shape)
+                    head[r, c] += 1
+                    more = head[r, c] < tail[r, c]
+                    head_anchor[r, c] = np.where(more, anchor(ring[r, c, head[r, c] % ring_size]), np.inf)
+                    head_hit[r, c] = False
+
+            if tick % self.compact_every == 0:
+                # Racers that can't reach the line before max_ticks can't win
+                stalled = alive & ((self.distance - position) > 40 * speed * (self.max_ticks - tick))
+                if stalled.any():
+                    kill(stalled)
+                live = alive.any(axis=1)
+                if not live.any():
+                    break
+                if live.mean() < 0.9:
+                    rows = rows[live]
+                    position, speed, velocity = position[live], speed[live], velocity[live]
+                    alive, in_event, due = alive[live], in_event[live], due[live]
+                    head_anchor, head_hit = head_anchor[live], head_hit[live]
+                    last_spawn, ring = last_spawn[live], ring[live]
+                    head, tail = head[live], tail[live]
+                    shape = position.shape
+                    noise, offset = np.empty(shape), np.empty(shape)
+
+        return winners
@@ -0,0 +1,60 @@
+import numpy as np
+from raster import hex_to_rgb
+
+MAX_PARTICLE_SIZE = 4
+
+class ParticleField:
+    # Sand particles as NumPy arrays: one vectorized step per frame and a
+    # single rasterized image instead of one canvas oval per particle
+    def __init__(self, width, height, count, min_size=1, max_size=MAX_PARTICLE_SIZE, rng=None):
+        self.width = width
+        self.height = height
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.x = self.rng.uniform(0, width, count)
+        self.y = self.rng.uniform(0, height, count)
+        self.size = self.rng.uniform(min_size, max_size, count)  # Larger size variation
+        self.active = count  # Only the first `active` particles move and are drawn
+
+    def __len__(self):
+        return self.active
+
+    def thin(self, fraction):
+        # Draw only this fraction of the particles (positions are random, so
+        # any prefix is an even spread)
+        self.active = int(len(self.x) * fraction)
+
+    def step(self):
+        # Drift right with a little vertical jitter, wrapping around the screen
+        n = self.active
+        x, y = self.x[:n], self.y[:n]
+        x += self.rng.uniform(1, 3, n)
+        y += self.rng.uniform(-0.5, 0.5, n)
+        np.mod(x, self.width, out=x)
+        np.mod(y, self.height, out=y)
+
+    def rasterize(self, frame, fill, outline, origin=(0, 0), mask=None):
+        # Draw every particle as a small filled square with a 1px outline into
+        # `frame`, whose top-left pixel sits at canvas position `origin`
+        # `mask`, if given, has one entry per active particle
+        ox, oy = origin
+        h, w = frame.shape[:2]
+        n = self.active
+        x = self.x[:n].astype(np.intp) - int(ox)
+        y = self.y[:n].astype(np.intp) - int(oy)
+        s = np.clip(np.rint(self.size[:n]).astype(np.intp), 1, MAX_PARTICLE_SIZE)
+        keep = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+        if mask is not None:
+            keep &= mask
+        x, y, s = x[keep], y[keep], s[keep]
+
+        fill_rgb = np.array(hex_to_rgb(fill), dtype=np.uint8)
+        outline_rgb = np.array(hex_to_rgb(outline), dtype=np.uint8)
+        for dy in range(MAX_PARTICLE_SIZE):
+            for dx in range(MAX_PARTICLE_SIZE):
+                sel = (dx < s) & (dy < s) & (x + dx < w) & (y + dy < h)
+                if not sel.any():
+                    continue
+                ss = s[sel]
+                border = (dx == 0) | (dy == 0) | (dx == ss - 1) | (dy == ss - 1)
+                frame[y[sel] + dy, x[sel] + dx] = np.where(border[:, None], outline_rgb, fill_rgb)
+        return frame
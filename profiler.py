@@ -0,0 +1,105 @@
+import csv
+import json
+import time
+import numpy as np
+
+# Low-overhead phase timing. Every sample (one simulated tick, one drawn
+# frame) is a row of a preallocated ring buffer holding the seconds spent in
+# each phase, so recording never allocates and long races keep only the
+# most recent `capacity` samples.
+
+RACE_PHASES = ('spawn', 'obstacles', 'collisions', 'events', 'movement', 'dodge', 'listeners')
+DRAW_PHASES = ('scene', 'sand', 'obstacles', 'racers', 'messages', 'overlay', 'flush')
+
+class PhaseProfiler:
+    def __init__(self, phases, capacity=8192, clock=time.perf_counter):
+        self.phases = tuple(phases)
+        self.columns = {phase: i for i, phase in enumerate(self.phases)}
+        self.capacity = capacity
+        self.clock = clock
+        self.samples = np.zeros((capacity, len(self.phases)))
+        self.started = np.zeros(capacity)  # Clock reading at the start of each sample
+        self.count = 0  # Samples recorded so far, including overwritten ones
+        self.current = [0.0] * len(self.phases)
+        self.start = self.last = 0.0
+
+    def begin(self):
+        self.current = [0.0] * len(self.phases)  # Plain floats while timing; cheaper than array writes
+        self.last = self.start = self.clock()
+
+    def mark(self, phase):
+        # Time since the previous mark (or begin) is charged to `phase`;
+        # marking the same phase repeatedly within a sample accumulates
+        now = self.clock()
+        self.current[self.columns[phase]] += now - self.last
+        self.last = now
+
+    def end(self):
+        row = self.count % self.capacity
+        self.samples[row] = self.current
+        self.started[row] = self.start
+        self.count += 1
+
+    def sample_seconds(self):
+        # Total time of the sample just ended (or in progress, up to its last mark)
+        return self.last - self.start
+
+    def recorded(self):
+        # Samples still held in the buffer
+        return min(self.count, self.capacity)
+
+    def history(self, last=None):
+        # (rows, start times) of the recorded samples, oldest first
+        n = self.recorded() if last is None else min(last, self.recorded())
+        rows = np.arange(self.count - n, self.count) % self.capacity
+        return self.samples[rows], self.started[rows]
+
+    def summary(self, last=None):
+        samples, started = self.history(last)
+        if not len(samples):
+            return None
+        totals = samples.sum(axis=1) * 1000
+        elapsed = started[-1] - started[0]
+        p50, p95, p99 = np.percentile(totals, (50, 95, 99))
+        return {
+            'samples': len(samples),
+            'rate': float((len(samples) - 1) / elapsed) if elapsed > 0 else 0.0,  # Samples per second
+            'mean_ms': float(totals.mean()),
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': float(totals.max()),
+            'phase_mean_ms': dict(zip(self.phases, (samples.mean(axis=0) * 1000).tolist())),
+        }
+
+def dump_profiles(path, **profilers):
+    # Write the timing history of each named profiler to `path`: JSON with
+    # a summary per profiler, or one CSV row per sample (times in ms)
+    if str(path).endswith('.csv'):
+        phases = []
+        for profiler in profilers.values():
+            phases += [phase for phase in profiler.phases if phase not in phases]
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['source', 'sample', 'start_s', 'total_ms'] + phases)
+            for name, profiler in profilers.items():
+                samples, started = profiler.history()
+                started = started - (started[0] if len(started) else 0.0)
+                first = profiler.count - len(samples)
+                for i, (row, start) in enumerate(zip(samples * 1000, started)):
+                    times = dict(zip(profiler.phases, row))
+                    writer.writerow([name, first + i, f"{start:.6f}", f"{row.sum():.4f}"] +
+                                    [f"{times[phase]:.4f}" if phase in times else '' for phase in phases])
+        return
+    report = {}
+    for name, profiler in profilers.items():
+        samples, started = profiler.history()
+        started = started - (started[0] if len(started) else 0.0)
+        report[name] = {
+            'phases': list(profiler.phases),
+            'summary': profiler.summary(),
+            'start_s': started.tolist(),
+            'samples_ms': (samples * 1000).round(4).tolist(),
+        }
+    with open(path, 'w') as f:
+        json.dump(report, f)
@@ -0,0 +1,76 @@
+# Adaptive render quality. The race view measures how long each frame
+# takes to draw and a QualityGovernor steps through QUALITY_LEVELS to keep
+# that within a budget: slow machines shed sand particles, checker detail,
+# HUD refreshes and glow/effect rings; fast ones get them back.
+
+DRAW_BUDGET = 0.012  # Seconds of drawing per frame; the race ticks every 20 ms
+
+class QualityLevel:
+    def __init__(self, name, particles, checker, hud_every, glow, effects):
+        self.name = name
+        self.particles = particles  # Fraction of the sand particles drawn
+        self.checker = checker  # Finish line checker square size in pixels; 0 for plain posts
+        self.hud_every = hud_every  # Refresh HUD text every this many frames
+        self.glow = glow  # Engine glows
+        self.effects = effects  # Event effect rings
+
+# Best first
+QUALITY_LEVELS = [
+    QualityLevel('high', 1.0, 10, 1, True, True),
+    QualityLevel('medium', 0.5, 20, 2, True, True),
+    QualityLevel('low', 0.2, 40, 5, False, True),
+    QualityLevel('minimal', 0.0, 0, 10, False, False),
+]
+
+class QualityGovernor:
+    # Frame times are judged in blocks of `window` frames by their 90th
+    # percentile. A block over budget drops a level straight away; getting
+    # a level back needs a block comfortably under budget (upgrade_below)
+    # after `hold` frames at the current level. An upgrade that has to be
+    # undone within two blocks doubles the hold, so a machine sitting on the
+    # edge of a level settles instead of flipping back and forth.
+    def __init__(self, budget=DRAW_BUDGET, levels=QUALITY_LEVELS, window=60,
+                 upgrade_below=0.6, hold=120, max_hold=3000, fixed=None):
+        self.budget = budget
+        self.levels = levels
+        self.window = window
+        self.upgrade_below = upgrade_below
+        self.hold = hold
+        self.max_hold = max_hold
+        self.index = 0
+        self.samples = []
+        self.frames_at_level = 0
+        self.upgraded = False  # The last change was an upgrade
+        self.fixed = fixed is not None  # A level picked by the user stays put
+        if self.fixed:
+            self.index = [level.name for level in levels].index(fixed)
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def record(self, seconds):
+        # One frame's draw time; True when the level changed
+        if self.fixed:
+            return False
+        self.frames_at_level += 1
+        self.samples.append(seconds)
+        if len(self.samples) < self.window:
+            return False
+        slow = sorted(self.samples)[int(len(self.samples) * 0.9)]
+        self.samples.clear()
+
+        if slow > self.budget and self.index < len(self.levels) - 1:
+            if self.upgraded and self.frames_at_level <= 2 * self.window:
+                self.hold = min(self.hold * 2, self.max_hold)
+            return self.change(1)
+        if (slow < self.budget * self.upgrade_below and self.index > 0
+                and self.frames_at_level >= self.hold):
+            return self.change(-1)
+        return False
+
+    def change(self, step):
+        self.index += step
+        self.upgraded = step < 0
+        self.frames_at_level = 0
+        return True
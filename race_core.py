@@ -0,0 +1,403 @@
+import heapq
+import itertools
+import math
+import random
+from bisect import bisect_right
+from operator import attrgetter
+from collision import swept_overlap
+
+OBSTACLE_SIZE = 20
+OBSTACLE_SPEED = 15  # Pixels per tick, towards the racers
+
+# Headless pod race simulation. Nothing in here touches Tk or pygame: the
+# arena size is explicit and anything that wants to react to the race
+# (rendering, audio, notifications) subscribes as a RaceListener.
+#
+# Every Race draws all its randomness from its own random.Random, seeded
+# from race.seed, so the same seed and racers always run the same race.
+# snapshot()/restore() save and put back everything step() depends on,
+# which is what replays seek with.
+
+class Event:
+    def __init__(self, name, probability, duration, speed_modifier, lethal=False):
+        self.name = name
+        self.probability = probability
+        self.duration = duration
+        self.speed_modifier = speed_modifier
+        self.lethal = lethal
+
+def default_events():
+    return [
+        Event("Engine Trouble", 0.005, 50, 0.5),    # 0.5% chance, reduced from 1%
+        Event("Sand Storm", 0.002, 100, 0.7),       # 0.2% chance, reduced from 0.5%
+        Event("Debris Hit", 0.003, 30, 0.6),        # 0.3% chance, reduced from 0.8%
+        Event("Critical Failure", 0.0005, 1, 0, True), # 0.05% chance, reduced from 0.1%
+    ]
+
+class EventScheduler:
+    # When each racer's next random event fires. Race.step used to roll
+    # every event for every free racer each tick and apply the first
+    # success; that is a geometric process, so instead the tick of the next
+    # success is drawn up front and kept in a heap, and which event it is
+    # gets picked when it fires. Racers cost nothing between events.
+    def __init__(self, events, rng=random):
+        self.events = events
+        self.rng = rng
+        # Chance that some event fires on a roll, and how likely each event
+        # is to be the one (rolled in order, first success wins)
+        miss = 1.0
+        weights = []
+        for event in events:
+            weights.append(miss * event.probability)
+            miss *= 1 - event.probability
+        self.any_event = 1 - miss
+        self.cum_weights = list(itertools.accumulate(weights))
+        self.log_miss = math.log(miss) if 0 < miss < 1 else None
+        self.heap = []  # (tick, racer index)
+
+    def schedule(self, index, tick):
+        # Racer `index` starts rolling on `tick` (it has no active event)
+        if self.any_event <= 0:
+            return
+        if self.log_miss is None:  # An event is certain on every roll
+            heapq.heappush(self.heap, (tick, index))
+            return
+        # Rolls up to and including the first success, by inversion
+        rolls = int(math.log(1.0 - self.rng.random()) / self.log_miss) + 1
+        heapq.heappush(self.heap, (tick + rolls - 1, index))
+
+    def due(self, tick):
+        # {racer index: event} for events firing on `tick`
+        fired = {}
+        heap = self.heap
+        while heap and heap[0][0] <= tick:
+            _, index = heapq.heappop(heap)
+            fired[index] = self.rng.choices(self.events, cum_weights=self.cum_weights)[0]
+        return fired
+
+class Obstacle:
+    def __init__(self, lane, x_pos, size=OBSTACLE_SIZE, rng=random):
+        self.lane = lane
+        self.x_pos = x_pos
+        self.size = size
+        self.speed = OBSTACLE_SPEED  # Speed of approach
+        self.hit = False  # Has already hit the racer in its lane
+        # Add vertical offset within lane (-1 for top, 0 for center, 1 for bottom)
+        self.y_offset = rng.choice([-0.5, 0, 0.5])
+
+    def update(self):
+        self.x_pos -= self.speed
+        return self.x_pos > -self.size  # Return False when off screen
+
+_x_pos = attrgetter('x_pos')
+
+class ObstacleIndex:
+    # Obstacles bucketed by lane. They all move left at the same speed, so
+    # spawn order is x order: each bucket stays sorted by x_pos for free,
+    # the newest obstacle is the rightmost one and expired obstacles are
+    # always at the front.
+    def __init__(self, lanes):
+        self.buckets = [[] for _ in range(lanes)]
+        self.occupied = set()  # Lanes with at least one obstacle
+        self.max_size = 0
+        self.max_speed = 0
+
+    def __iter__(self):
+        for lane in sorted(self.occupied):
+            yield from self.buckets[lane]
+
+    def __len__(self):
+        return sum(len(self.buckets[lane]) for lane in self.occupied)
+
+    def add(self, obstacle):
+        self.buckets[obstacle.lane].append(obstacle)
+        self.occupied.add(obstacle.lane)
+        self.max_size = max(self.max_size, obstacle.size)
+        self.max_speed = max(self.max_speed, obstacle.speed)
+
+    def in_lanes(self, lanes):
+        # Obstacles in the given lanes only, lane by lane
+        for lane in lanes:
+            yield from self.buckets[lane]
+
+    def newest(self, lane):
+        bucket = self.buckets[lane]
+        return bucket[-1] if bucket else None
+
+    def update(self):
+        # Only occupied lanes are visited, so huge mostly-empty fields are cheap
+        for lane in list(self.occupied):
+            bucket = self.buckets[lane]
+            expired = 0
+            for obs in bucket:
+                if not obs.update():
+                    expired += 1
+            if expired:
+                del bucket[:expired]  # Drop them from the front in one go
+                if not bucket:
+                    self.occupied.discard(lane)
+
+    def nearest_ahead(self, lane, x):
+        # First obstacle strictly to the right of x
+        bucket = self.buckets[lane]
+        i = bisect_right(bucket, x, key=_x_pos)
+        return bucket[i] if i < len(bucket) else None
+
+    def sweep(self, lane, x0, x1):
+        # Obstacles not hit before that the racer touched while moving from
+        # x0 to x1 this tick (they moved in from x_pos + speed). Only the
+        # window the two could have shared is scanned, so crowded lanes
+        # cost no more than empty ones.
+        bucket = self.buckets[lane]
+        low = min(x0, x1) - self.max_speed - self.max_size
+        high = max(x0, x1) + self.max_size
+        hits = []
+        for i in range(bisect_right(bucket, low, key=_x_pos), len(bucket)):
+            obs = bucket[i]
+            if obs.x_pos >= high:
+                break
+            if not obs.hit and swept_overlap(x0 - obs.x_pos - obs.speed, x1 - obs.x_pos, obs.size):
+                hits.append(obs)
+        return hits
+
+def obstacle_records(obstacles):
+    # Obstacles as plain tuples, for snapshots
+    return [(obs.lane, obs.x_pos, obs.size, obs.speed, obs.hit, obs.y_offset) for obs in obstacles]
+
+def obstacles_from_records(records, lanes, rng):
+    # ObstacleIndex back from obstacle_records(); draws from rng, so
+    # callers restore the RNG state afterwards
+    index = ObstacleIndex(lanes)
+    for lane, x_pos, size, speed, hit, y_offset in records:
+        obstacle = Obstacle(lane, x_pos, size, rng=rng)
+        obstacle.speed, obstacle.hit, obstacle.y_offset = speed, hit, y_offset
+        index.add(obstacle)
+    return index
+
+class Racer:
+    def __init__(self, name, rng=random):
+        self.name = name
+        self.position = 0
+        self.finished = False
+        self.speed = rng.uniform(0.8, 1.2)
+        self.active_event = None
+        self.event_duration = 0
+        self.destroyed = False
+        self.y_offset = 0  # Vertical offset from lane center
+        self.target_y_offset = 0  # Target position for smooth movement
+        self.max_y_offset = 60  # Increased for more vertical movement
+        self.y_speed = 4  # Faster vertical movement
+        self.dodge_direction = 0  # -1 for up, 1 for down, 0 for center
+        self.target_y = 0  # Target y position within lane
+
+    def apply_event(self, event):
+        self.active_event = event
+        self.event_duration = event.duration
+        if event.lethal:
+            self.destroyed = True
+            self.finished = True
+
+    def update_vertical_position(self):
+        # More fluid vertical movement
+        if self.dodge_direction != 0:
+            target = self.dodge_direction * self.max_y_offset
+            if self.y_offset < target:
+                self.y_offset = min(self.y_offset + self.y_speed, target)
+            elif self.y_offset > target:
+                self.y_offset = max(self.y_offset - self.y_speed, target)
+        else:
+            # Return to center when no obstacles
+            if self.y_offset > 0:
+                self.y_offset = max(self.y_offset - self.y_speed, 0)
+            elif self.y_offset < 0:
+                self.y_offset = min(self.y_offset + self.y_speed, 0)
+
+class RaceListener:
+    # Subscribers override the callbacks they care about
+    def racer_event(self, race, racer, event):
+        pass
+
+    def racer_finished(self, race, racer):
+        pass
+
+    def race_tick(self, race):
+        pass
+
+class Race:
+    def __init__(self, distance, racers, width=1920, height=1080, seed=None):
+        self.distance = distance
+        self.seed = seed if seed is not None else random.randrange(2**64)
+        self.rng = random.Random(self.seed)
+        self.racers = [Racer(name, self.rng) for name in racers]
+        # Arena size in screen pixels: obstacles spawn at the right edge and
+        # racers are mapped onto `width - 100` pixels of track
+        self.width = width
+        self.height = height
+        self.finished_racers = []  # Add list to track finishing order
+        self.events = default_events()
+        self.scheduler = EventScheduler(self.events, self.rng)
+        for index in range(len(self.racers)):
+            self.scheduler.schedule(index, 0)
+        self.obstacles = ObstacleIndex(len(self.racers))  # Active obstacles by lane
+        self.obstacle_spawn_rate = 0.015  # Reduced spawn rate
+        self.min_obstacle_spacing = 300  # Increased spacing
+        self.ticks = 0
+        self.listeners = []
+        self.profiler = None  # Optional profiler.PhaseProfiler timing each step
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def emit(self, callback, *args):
+        for listener in self.listeners:
+            getattr(listener, callback)(self, *args)
+
+    def step(self):
+        profiler = self.profiler
+        if profiler:
+            profiler.begin()
+
+        # Spawn new obstacles
+        rng = self.rng
+        if rng.random() < self.obstacle_spawn_rate:
+            # Check if there's enough space for a new obstacle; the newest
+            # obstacle in the lane is the rightmost one
+            spawn_lane = rng.randint(0, len(self.racers)-1)
+            newest = self.obstacles.newest(spawn_lane)
+            if newest is None or newest.x_pos <= self.width - self.min_obstacle_spacing:
+                self.obstacles.add(Obstacle(spawn_lane, self.width, rng=rng))
+        if profiler:
+            profiler.mark('spawn')
+
+        # Update obstacles
+        self.obstacles.update()
+        if profiler:
+            profiler.mark('obstacles')
+
+        # Random events due this tick
+        fired = self.scheduler.due(self.ticks)
+
+        # Update racers with obstacle avoidance
+        for lane, racer in enumerate(self.racers):
+            if not racer.finished and not racer.destroyed:
+                start_x = (racer.position / self.distance) * (self.width - 100)
+
+                # Update event duration
+                if racer.active_event:
+                    racer.event_duration -= 1
+                    if racer.event_duration <= 0:
+                        racer.active_event = None
+
+                # New random event; racers roll again the tick theirs ends
+                event = fired.get(lane)
+                if event:
+                    racer.apply_event(event)
+                    self.emit('racer_event', racer, event)
+                    if not event.lethal:
+                        self.scheduler.schedule(lane, self.ticks + event.duration)
+                if profiler:
+                    profiler.mark('events')
+
+                # Calculate movement with event modifications and increased base speed
+                base_movement = rng.uniform(1.0, 2.0) * racer.speed * 20  # Increased speed multiplier
+                if racer.active_event:
+                    base_movement *= racer.active_event.speed_modifier
+
+                racer.position += base_movement
+                if racer.position >= self.distance:
+                    if not racer.finished:  # Only announce the finish once
+                        self.emit('racer_finished', racer)
+                    racer.finished = True
+                    racer.position = self.distance
+                    if racer not in self.finished_racers:
+                        self.finished_racers.append(racer)
+                if profiler:
+                    profiler.mark('movement')
+
+                # Collisions anywhere along this tick's movement, each
+                # obstacle at most once
+                racer_x = (racer.position / self.distance) * (self.width - 100)
+                for obs in self.obstacles.sweep(lane, start_x, racer_x):
+                    obs.hit = True
+                    racer.speed *= 0.8  # Slow down
+                if profiler:
+                    profiler.mark('collisions')
+
+                # Find nearest obstacle ahead in racer's lane
+                nearest_obstacle = self.obstacles.nearest_ahead(lane, racer_x)
+                min_distance = nearest_obstacle.x_pos - racer_x if nearest_obstacle else float('inf')
+
+                # Update dodge behavior with chance to not dodge
+                if nearest_obstacle and min_distance < 300:  # Detection range
+                    if racer.dodge_direction == 0:
+                        # 80% chance to attempt dodge
+                        if rng.random() < 0.8:
+                            # Choose dodge direction based on position in lane
+                            lane_center = (lane + 0.5) * (self.height / len(self.racers))
+                            racer.dodge_direction = -1 if racer.y_offset < lane_center else 1
+                        else:
+                            # No dodge attempt
+                            racer.dodge_direction = 0
+                elif min_distance > 100:  # Return to center after passing obstacle
+                    racer.dodge_direction = 0
+
+                # Update vertical position
+                racer.update_vertical_position()
+                if profiler:
+                    profiler.mark('dodge')
+
+        self.ticks += 1
+        self.emit('race_tick')
+        if profiler:
+            profiler.mark('listeners')
+            profiler.end()
+
+    def run(self, max_ticks=None):
+        # Headless: simulate until every racer has finished (or max_ticks)
+        while not self.is_race_finished():
+            if max_ticks is not None and self.ticks >= max_ticks:
+                break
+            self.step()
+        return self.finished_racers
+
+    def snapshot(self):
+        # Everything step() reads or changes, as plain data (JSON-safe once
+        # the tuples are lists); restore() rebuilds the race from it
+        event_index = {event: i for i, event in enumerate(self.events)}
+        return {
+            'tick': self.ticks,
+            'rng': self.rng.getstate(),
+            'racers': [(r.position, r.finished, r.speed, event_index.get(r.active_event, -1), r.event_duration,
+                        r.destroyed, r.y_offset, r.dodge_direction) for r in self.racers],
+            'finished': [self.racers.index(racer) for racer in self.finished_racers],
+            'obstacles': obstacle_records(self.obstacles),
+            'schedule': list(self.scheduler.heap),
+        }
+
+    def restore(self, snapshot):
+        # Back to the state of a snapshot of this race (same racers and
+        # events). Listeners are not told; the next step carries on from there.
+        self.ticks = snapshot['tick']
+        for racer, state in zip(self.racers, snapshot['racers']):
+            (racer.position, racer.finished, racer.speed, event, racer.event_duration,
+             racer.destroyed, racer.y_offset, racer.dodge_direction) = state
+            racer.active_event = self.events[event] if event >= 0 else None
+        self.finished_racers = [self.racers[index] for index in snapshot['finished']]
+        self.obstacles = obstacles_from_records(snapshot['obstacles'], len(self.racers), self.rng)
+        self.scheduler.heap = [tuple(entry) for entry in snapshot['schedule']]
+        heapq.heapify(self.scheduler.heap)
+        version, state, gauss = snapshot['rng']  # Last: building obstacles drew from it
+        self.rng.setstate((version, tuple(state), gauss))
+
+    def is_race_finished(self):
+        return all(racer.finished for racer in self.racers)
+
+    def display_status(self):
+        print("\n" + "=" * 50)
+        for racer in self.racers:
+            progress = int((racer.position / self.distance) * 20)
+            print(f"{racer.name}: {'#' * progress}{'-' * (20-progress)} {racer.position:.1f}m")
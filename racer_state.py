@@ -0,0 +1,242 @@
+import numpy as np
+from race_core import Race, Obstacle, ObstacleIndex, default_events, obstacle_records, obstacles_from_records
+from collision import lane_hits
+
+# Struct-of-arrays racer state for very large (mass start) fields, plus a
+# Race whose step is vectorized over the whole field with the same rules
+# as Race.step and Racer.update_vertical_position.
+
+NO_EVENT = -1
+NEVER = np.iinfo(np.int64).max
+# RacerState columns that change as the race runs, saved by MassRace.snapshot
+STATE_COLUMNS = ('position', 'speed', 'y_offset', 'dodge_direction', 'event_id',
+                 'event_duration', 'finished', 'destroyed', 'next_event')
+
+class RacerState:
+    def __init__(self, count, events, speeds=None, rng=None):
+        rng = rng if rng is not None else np.random.default_rng()
+        self.count = count
+        self.events = events
+        self.position = np.zeros(count)
+        self.speed = np.asarray(speeds, dtype=float).copy() if speeds is not None else rng.uniform(0.8, 1.2, count)
+        self.y_offset = np.zeros(count)  # Vertical offset from lane center
+        self.dodge_direction = np.zeros(count, dtype=np.int8)  # -1 up, 1 down, 0 center
+        self.event_id = np.full(count, NO_EVENT, dtype=np.int16)
+        self.event_duration = np.zeros(count, dtype=np.int32)
+        self.finished = np.zeros(count, dtype=bool)
+        self.destroyed = np.zeros(count, dtype=bool)
+        self.max_y_offset = 60
+        self.y_speed = 4
+
+        # Per-event lookup tables; index NO_EVENT (-1) hits the trailing
+        # "no event" entry
+        self.event_duration_table = np.array([e.duration for e in events], dtype=np.int32)
+        self.event_modifier_table = np.array([e.speed_modifier for e in events] + [1.0])
+        self.event_lethal_table = np.array([e.lethal for e in events] + [False])
+        # Race.step rolls the events in order and takes the first success:
+        # the tick of the next success is geometric (see EventScheduler), and
+        # one uniform draw against these cumulative bounds picks the event
+        probabilities = np.array([e.probability for e in events])
+        first_success = probabilities * np.concatenate(([1.0], np.cumprod(1 - probabilities)[:-1]))
+        self.any_event = first_success.sum()
+        self.event_bounds = np.cumsum(first_success) / self.any_event if self.any_event > 0 else first_success
+        self.rng = rng
+        self.next_event = np.full(count, NEVER, dtype=np.int64)  # Tick each racer's next event fires
+        self.schedule_events(np.arange(count), 0)
+
+    def schedule_events(self, index, tick):
+        # Racers in index start rolling on tick
+        if self.any_event > 0:
+            self.next_event[index] = tick + self.rng.geometric(self.any_event, len(index)) - 1
+
+    def apply_events(self, index, event_ids):
+        self.event_id[index] = event_ids
+        self.event_duration[index] = self.event_duration_table[event_ids]
+        lethal = index[self.event_lethal_table[event_ids]]
+        self.destroyed[lethal] = True
+        self.finished[lethal] = True
+
+    def update_vertical_position(self, index):
+        # Move toward dodge_direction * max_y_offset (center when 0) by at most y_speed
+        target = self.dodge_direction[index] * self.max_y_offset
+        y = self.y_offset[index]
+        self.y_offset[index] = y + np.clip(target - y, -self.y_speed, self.y_speed)
+
+def _field(name, cast):
+    return property(lambda self: cast(getattr(self.state, name)[self.index]))
+
+class RacerView:
+    # Read-only Racer look-alike over one row of a RacerState, so the
+    # existing UI code can draw mass races
+    def __init__(self, state, index, name):
+        self.state = state
+        self.index = index
+        self.name = name
+
+    position = _field('position', float)
+    speed = _field('speed', float)
+    y_offset = _field('y_offset', float)
+    dodge_direction = _field('dodge_direction', int)
+    event_duration = _field('event_duration', int)
+    finished = _field('finished', bool)
+    destroyed = _field('destroyed', bool)
+
+    @property
+    def active_event(self):
+        event_id = self.state.event_id[self.index]
+        return self.state.events[event_id] if event_id != NO_EVENT else None
+
+class MassRace(Race):
+    def __init__(self, distance, count, width=1920, height=1080, names=None, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.distance = distance
+        self.width = width
+        self.height = height
+        self.events = default_events()
+        self.state = RacerState(count, self.events, rng=self.rng)
+        names = names if names is not None else [f"Pod {i + 1}" for i in range(count)]
+        self.racers = [RacerView(self.state, i, name) for i, name in enumerate(names)]
+        self.finished_racers = []
+        self.obstacles = ObstacleIndex(count)
+        self.obstacle_spawn_rate = 0.015
+        self.min_obstacle_spacing = 300
+        self.ticks = 0
+        self.listeners = []
+        self.profiler = None
+
+    def snapshot(self):
+        # As Race.snapshot, with copies of the state arrays (not JSON-safe)
+        return {
+            'tick': self.ticks,
+            'rng': self.rng.bit_generator.state,
+            'state': {name: getattr(self.state, name).copy() for name in STATE_COLUMNS},
+            'finished': [racer.index for racer in self.finished_racers],
+            'obstacles': obstacle_records(self.obstacles),
+        }
+
+    def restore(self, snapshot):
+        self.ticks = snapshot['tick']
+        for name, column in snapshot['state'].items():
+            getattr(self.state, name)[:] = column
+        self.finished_racers = [self.racers[index] for index in snapshot['finished']]
+        self.obstacles = obstacles_from_records(snapshot['obstacles'], self.state.count, self.rng)
+        self.rng.bit_generator.state = snapshot['rng']  # Last: building obstacles drew from it
+
+    def obstacle_arrays(self):
+        obstacles = list(self.obstacles)
+        lanes = np.fromiter((obs.lane for obs in obstacles), dtype=np.intp, count=len(obstacles))
+        x_pos = np.fromiter((obs.x_pos for obs in obstacles), dtype=float, count=len(obstacles))
+        sizes = np.fromiter((obs.size for obs in obstacles), dtype=float, count=len(obstacles))
+        speeds = np.fromiter((obs.speed for obs in obstacles), dtype=float, count=len(obstacles))
+        hit = np.fromiter((obs.hit for obs in obstacles), dtype=bool, count=len(obstacles))
+        return obstacles, lanes, x_pos, sizes, speeds, hit
+
+    def step(self):
+        state = self.state
+        rng = self.rng
+        scale = (self.width - 100) / self.distance
+        profiler = self.profiler
+        if profiler:
+            profiler.begin()
+
+        # Spawn new obstacles (one roll for the whole field, like Race.step)
+        if rng.random() < self.obstacle_spawn_rate:
+            spawn_lane = int(rng.integers(state.count))
+            newest = self.obstacles.newest(spawn_lane)
+            if newest is None or newest.x_pos <= self.width - self.min_obstacle_spacing:
+                self.obstacles.add(Obstacle(spawn_lane, self.width, rng=rng))
+        if profiler:
+            profiler.mark('spawn')
+        self.obstacles.update()
+        if profiler:
+            profiler.mark('obstacles')
+
+        active = np.flatnonzero(~state.finished & ~state.destroyed)
+        if not len(active):
+            self.ticks += 1
+            self.emit('race_tick')
+            if profiler:
+                profiler.mark('listeners')
+                profiler.end()
+            return
+        is_active = np.zeros(state.count, dtype=bool)
+        is_active[active] = True
+
+        start_x = state.position * scale
+
+        # Update event duration
+        in_event = active[state.event_id[active] != NO_EVENT]
+        state.event_duration[in_event] -= 1
+        state.event_id[in_event[state.event_duration[in_event] <= 0]] = NO_EVENT
+
+        # New random events; racers roll again the tick theirs ends
+        index = active[state.next_event[active] == self.ticks]
+        if len(index):
+            event_ids = np.minimum(np.searchsorted(state.event_bounds, rng.random(len(index)), side='right'),
+                                   len(self.events) - 1)
+            state.apply_events(index, event_ids)
+            state.next_event[index] = NEVER
+            alive = ~state.destroyed[index]
+            state.schedule_events(index[alive], self.ticks + state.event_duration_table[event_ids[alive]])
+            if self.listeners:
+                for i, event_id in zip(index, event_ids):
+                    self.emit('racer_event', self.racers[i], self.events[event_id])
+        if profiler:
+            profiler.mark('events')
+
+        # Movement with event modifiers
+        movement = rng.uniform(1.0, 2.0, len(active)) * state.speed[active] * 20
+        movement *= state.event_modifier_table[state.event_id[active]]
+        state.position[active] += movement
+        crossed = active[(state.position[active] >= self.distance) & ~state.destroyed[active]]
+        if len(crossed):
+            state.finished[crossed] = True
+            state.position[crossed] = self.distance
+            for i in crossed:  # Lane order, like Race.step
+                self.finished_racers.append(self.racers[i])
+                self.emit('racer_finished', self.racers[i])
+        if profiler:
+            profiler.mark('movement')
+
+        # Collisions swept over this tick's movement, each obstacle at most
+        # once; obstacles are sparse, so work per obstacle
+        racer_x = state.position * scale
+        obstacles, lanes, x_pos, sizes, speeds, hit = self.obstacle_arrays()
+        if len(lanes):
+            hit = is_active[lanes] & lane_hits(start_x, racer_x, lanes, x_pos, speeds, sizes, hit)
+            np.multiply.at(state.speed, lanes[hit], 0.8)
+            for i in np.flatnonzero(hit):
+                obstacles[i].hit = True
+        if profiler:
+            profiler.mark('collisions')
+
+        # Nearest obstacle ahead per lane
+        nearest = np.full(state.count, np.inf)
+        if len(lanes):
+            ahead_by = x_pos - racer_x[lanes]
+            ahead = is_active[lanes] & (ahead_by > 0)
+            np.minimum.at(nearest, lanes[ahead], ahead_by[ahead])
+
+        # Dodge: within detection range a centred racer tries to dodge 80% of
+        # the time; out of range everyone returns to center
+        near = nearest[active] < 300
+        deciding = active[near & (state.dodge_direction[active] == 0)]
+        if len(deciding):
+            attempt = rng.random(len(deciding)) < 0.8
+            lane_center = (deciding + 0.5) * (self.height / state.count)
+            direction = np.where(state.y_offset[deciding] < lane_center, -1, 1)
+            state.dodge_direction[deciding] = np.where(attempt, direction, 0)
+        state.dodge_direction[active[~near]] = 0
+
+        state.update_vertical_position(active)
+        if profiler:
+            profiler.mark('dodge')
+
+        self.ticks += 1
+        self.emit('race_tick')
+        if profiler:
+            profiler.mark('listeners')
+            profiler.end()
+
+    def is_race_finished(self):
+        return bool(self.state.finished.all())
@@ -0,0 +1,78 @@
+import numpy as np
+
+# Small NumPy drawing helpers for building canvas images off-Tk.
+# Frames are (height, width, 3) uint8 arrays.
+
+def hex_to_rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
+
+def new_frame(width, height, color):
+    frame = np.empty((int(height), int(width), 3), dtype=np.uint8)
+    frame[:] = hex_to_rgb(color)
+    return frame
+
+def fill_polygon(frame, points, fill, outline=None, origin=(0, 0)):
+    # Even-odd scanline fill over the polygon's bounding box. `origin` is the
+    # canvas position of the frame's top-left pixel.
+    ox, oy = origin
+    pts = np.asarray(points, dtype=float) - (ox, oy)
+    h, w = frame.shape[:2]
+    x0 = max(int(np.floor(pts[:, 0].min())), 0)
+    x1 = min(int(np.ceil(pts[:, 0].max())) + 1, w)
+    y0 = max(int(np.floor(pts[:, 1].min())), 0)
+    y1 = min(int(np.ceil(pts[:, 1].max())) + 1, h)
+    if x0 >= x1 or y0 >= y1:
+        return
+
+    px = np.arange(x0, x1) + 0.5
+    py = (np.arange(y0, y1) + 0.5)[:, None]
+    inside = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+    for (ax, ay), (bx, by) in zip(pts, np.roll(pts, -1, axis=0)):
+        if ay == by:
+            continue
+        crosses = (ay > py) != (by > py)
+        x_cross = ax + (py - ay) * (bx - ax) / (by - ay)
+        inside ^= crosses & (px < x_cross)
+
+    region = frame[y0:y1, x0:x1]
+    region[inside] = hex_to_rgb(fill)
+    if outline is not None:
+        # Pixels inside the polygon with a neighbour outside it
+        edge = inside.copy()
+        padded = np.pad(inside, 1, constant_values=False)
+        edge &= ~(padded[:-2, 1:-1] & padded[2:, 1:-1] & padded[1:-1, :-2] & padded[1:-1, 2:])
+        region[edge] = hex_to_rgb(outline)
+
+def fill_rect(frame, x0, y0, x1, y1, fill, outline=None, mask=None):
+    # Canvas-style rectangle covering [x0, x1) x [y0, y1) with a 1px
+    # outline; `mask`, when given, records the pixels painted
+    h, w = frame.shape[:2]
+    x0, y0 = max(int(x0), 0), max(int(y0), 0)
+    x1, y1 = min(int(x1), w), min(int(y1), h)
+    if x0 >= x1 or y0 >= y1:
+        return
+    frame[y0:y1, x0:x1] = hex_to_rgb(fill)
+    if outline is not None:
+        rgb = hex_to_rgb(outline)
+        frame[y0:y1, [x0, x1 - 1]] = rgb
+        frame[[y0, y1 - 1], x0:x1] = rgb
+    if mask is not None:
+        mask[y0:y1, x0:x1] = True
+
+def hline(frame, y, fill, width=1, dash=None, mask=None):
+    # Full-width horizontal line centred on row y; dash is (on, off) pixels
+    h, w = frame.shape[:2]
+    rows = slice(max(int(y) - width // 2, 0), min(int(y) - width // 2 + width, h))
+    cols = np.arange(w)
+    if dash is not None:
+        on, off = dash
+        cols = cols[cols % (on + off) < on]
+    frame[rows, cols] = hex_to_rgb(fill)
+    if mask is not None:
+        mask[rows, cols] = True
+
+def ppm_bytes(frame):
+    # Binary PPM is the cheapest format tk.PhotoImage can decode from memory
+    h, w = frame.shape[:2]
+    return b'P6 %d %d 255 ' % (w, h) + np.ascontiguousarray(frame).tobytes()
@@ -0,0 +1,83 @@
+# Retained-mode helpers for tk.Canvas. Items are created once and afterwards
+# only moved/reconfigured, and only when the values pushed to them change.
+
+# Placeholder coordinates used when a pooled item is created before its
+# first real position is known
+PLACEHOLDER_COORDS = {
+    'polygon': (0, 0, 0, 0, 0, 0),
+    'oval': (0, 0, 0, 0),
+    'rectangle': (0, 0, 0, 0),
+    'line': (0, 0, 0, 0),
+    'text': (0, 0),
+    'image': (0, 0),
+}
+
+def flatten(points):
+    # [(x, y), ...] -> (x, y, x, y, ...) as expected by Canvas.coords
+    return tuple(v for point in points for v in point)
+
+class RetainedCanvas:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._coords = {}   # item id -> last coords sent to Tk
+        self._options = {}  # item id -> last options sent to Tk
+
+    def create(self, kind, coords, **options):
+        coords = tuple(coords)
+        item = getattr(self.canvas, f'create_{kind}')(*coords, **options)
+        self._coords[item] = coords
+        self._options[item] = dict(options)
+        return item
+
+    def coords(self, item, coords):
+        coords = tuple(coords)
+        if self._coords.get(item) != coords:
+            self.canvas.coords(item, *coords)
+            self._coords[item] = coords
+
+    def config(self, item, **options):
+        last = self._options.setdefault(item, {})
+        changed = {k: v for k, v in options.items() if last.get(k, None) != v}
+        if changed:
+            self.canvas.itemconfig(item, **changed)
+            last.update(changed)
+
+    def show(self, item, visible=True):
+        self.config(item, state='normal' if visible else 'hidden')
+
+    def delete(self, item):
+        self.canvas.delete(item)
+        self._coords.pop(item, None)
+        self._options.pop(item, None)
+
+    def clear(self):
+        self.canvas.delete("all")
+        self._coords.clear()
+        self._options.clear()
+
+    def __len__(self):
+        return len(self._coords)  # Items currently on the canvas
+
+class ItemPool:
+    # A growable set of same-kind items (obstacles, messages...). New items are
+    # slotted in below the `below` tag so pooled layers keep their stacking order.
+    def __init__(self, scene, kind, below=None, **defaults):
+        self.scene = scene
+        self.kind = kind
+        self.below = below
+        self.defaults = defaults
+        self.items = []
+
+    def resize(self, count):
+        canvas = self.scene.canvas
+        while len(self.items) < count:
+            item = self.scene.create(self.kind, PLACEHOLDER_COORDS[self.kind], **self.defaults)
+            if self.below and canvas.find_withtag(self.below):
+                canvas.tag_lower(item, self.below)
+            self.items.append(item)
+        while len(self.items) > count:
+            self.scene.delete(self.items.pop())
+        return self.items
+
+    def __len__(self):
+        return len(self.items)
@@ -0,0 +1,75 @@
+import json
+from bisect import bisect_right
+from race_core import Race, RaceListener
+
+# Race replays. A race is fully determined by its seed and setup, so a
+# replay only stores those plus a keyframe (Race.snapshot()) every
+# KEYFRAME_TICKS ticks. Seeking to any tick restores the nearest keyframe at
+# or before it and simulates forward from there, so it never costs more
+# than KEYFRAME_TICKS steps however long the race.
+
+KEYFRAME_TICKS = 250  # 5 seconds of racing
+
+class Replay(RaceListener):
+    def __init__(self, setup, interval=KEYFRAME_TICKS, keyframes=None, ticks=0):
+        self.setup = setup  # Seed, racers, arena and spawn settings; see record()
+        self.interval = interval
+        self.keyframes = keyframes or []
+        self.ticks = ticks  # Last tick recorded
+
+    @classmethod
+    def record(cls, race, interval=KEYFRAME_TICKS):
+        # Subscribe the result before the race starts stepping; keyframes
+        # are taken as it runs
+        if not hasattr(race, 'seed'):  # MassRace: built from a Generator, not a seed
+            raise TypeError(f"{type(race).__name__} can't be replayed: it has no seed to rebuild it from")
+        setup = {'seed': race.seed, 'names': [racer.name for racer in race.racers],
+                 'distance': race.distance, 'width': race.width, 'height': race.height,
+                 'obstacle_spawn_rate': race.obstacle_spawn_rate,
+                 'min_obstacle_spacing': race.min_obstacle_spacing}
+        return cls(setup, interval, [race.snapshot()], race.ticks)
+
+    def race_tick(self, race):
+        self.ticks = race.ticks
+        if race.ticks % self.interval == 0:
+            self.keyframes.append(race.snapshot())
+
+    def new_race(self):
+        # A race set up like the recorded one, at its first keyframe
+        setup = self.setup
+        race = Race(setup['distance'], setup['names'], setup['width'], setup['height'], seed=setup['seed'])
+        race.obstacle_spawn_rate = setup['obstacle_spawn_rate']
+        race.min_obstacle_spacing = setup['min_obstacle_spacing']
+        race.restore(self.keyframes[0])
+        return race
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'setup': self.setup, 'interval': self.interval,
+                       'ticks': self.ticks, 'keyframes': self.keyframes}, f)
+
+def load_replay(path):
+    with open(path) as f:
+        return Replay(**json.load(f))
+
+class ReplayPlayer:
+    # Owns a private race (no listeners) and moves it to whatever tick is asked for
+    def __init__(self, replay):
+        self.replay = replay
+        self.race = replay.new_race()
+        self.keyframe_ticks = [keyframe['tick'] for keyframe in replay.keyframes]
+
+    def seek(self, tick):
+        # The race at `tick` (clamped to the recording). Playing forward
+        # steps on from where the race already is, even onto a keyframe
+        # tick: restoring rebuilds the obstacles, and the interpolator
+        # follows them by identity. Only seeking backwards or more than a
+        # keyframe interval ahead restores.
+        tick = max(self.keyframe_ticks[0], min(int(tick), self.replay.ticks))
+        race = self.race
+        if not race.ticks <= tick < race.ticks + self.replay.interval:
+            index = bisect_right(self.keyframe_ticks, tick) - 1
+            race.restore(self.replay.keyframes[index])
+        while race.ticks < tick:
+            race.step()
+        return race
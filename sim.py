@@ -1,118 +1,174 @@
-import turtle
-import random
-from courses.default import draw_track
-from PIL import ImageGrab
+import argparse
+import time
 import numpy as np
+import courses
 
-# Screen setup
-screen = turtle.Screen()
-screen.setup(width=1.0, height=1.0)  # Sets window to full screen
-screen.title("Turtle Race")
-
-# Before drawing track
-screen.tracer(0)  # Turn off animation
-
-# Create track drawer first
-track_drawer = turtle.Turtle()
-track_drawer.speed(0)  # Fastest speed
-
-# After screen setup, add track drawing
-track_drawer.penup()
-track_drawer.goto(0, 350)
-track_drawer.pendown()
-track_drawer.color("gray")
-track_drawer.width(50)
-
-draw_track(track_drawer)
-
-# After drawing track
-screen.update()  # Update screen once track is complete
-screen.tracer(1)  # Resume animation for racers
-
-# Racer setup (example with 3 racers)
-# racer_colors = ["red", "blue", "green", "purple", "orange", "black"]
-racer_colors = ["red"]
-racers = []
-
-# Modify racer setup to start at the beginning of the curve
-for i in range(len(racer_colors)):
-    racer = turtle.Turtle()
-    racer.shape("turtle")
-    racer.color(racer_colors[i])
-    racer.penup()
-    racer.goto(0, 350 + i * 10)  # Changed from -80 to 20
-    racer.pendown()
-    racers.append(racer)
-
-# Race logic
-finish_line = -50  # X-coordinate of the finish line
-
-def get_pixel_color(x, y):
-    # Convert turtle coordinates to screen coordinates
-    canvas = screen.getcanvas()
-    root = canvas.winfo_toplevel()
-    screen_x = root.winfo_x() + canvas.winfo_width()/2 + x
-    screen_y = root.winfo_y() + canvas.winfo_height()/2 - y
-    
-    # Capture screen at point
-    image = ImageGrab.grab(bbox=(screen_x-1, screen_y-1, screen_x+1, screen_y+1))
-    pixel = np.array(image)
-    color = tuple(pixel[0,0])  # RGB values
-    print(color)
-    
-    # Check if color is close to gray (track color)
-    if color == (80,80,80):
-        print("here")
-        return "gray"
+# Turtle race around a compiled course. Racer state lives in arrays and is
+# advanced for the whole field at once each tick; the turtles only mirror
+# it. With --headless there are no turtles (or window) at all.
+
+FRAME_RATE = 30  # Target ticks per second when drawing
+LOOKAHEAD = 30  # Racers aim at the track direction this far ahead
+CENTERING = 0.5  # Degrees of correction per pixel off the centerline
+PROGRESS_WINDOW = 20  # Progress can't change by more than this in a tick (steps are at most 5 pixels)
+RACER_COLORS = ["red", "blue", "green", "purple", "orange", "black"]
+
+class Field:
+    # Poses of every racer, in turtle coordinates and degrees
+    def __init__(self, course, track, count, rng=None):
+        self.track = track
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.x = np.full(count, float(course.start[0]))
+        self.y = course.start[1] + np.arange(count) * 10.0  # Side by side at the start
+        self.heading = np.full(count, float(course.heading))
+        self.progress = track.progress_at(self.x, self.y).astype(float)
+        self.travelled = np.zeros(count)  # Arc length covered, across laps
+        self.astray = np.zeros(count, dtype=bool)  # Nearest centerline point is on another branch
+        self.ticks = 0
+
+    def steer(self):
+        # Turn (degrees, positive is left) for every racer this tick
+        track = self.track
+        x, y = self.x, self.y
+        off = track.distance_at(x, y) > 0  # Not on track
+        gx, gy = track.gradient_at(x, y)
+        lost = off & (gx == 0) & (gy == 0)  # Too far out for the distance field
+
+        # On track: follow the track's direction just ahead of the racer's
+        # tracked progress, pulled towards the centerline (measured from that
+        # progress for racers whose nearest centerline is another branch).
+        # Off track: head back down the distance gradient.
+        lateral = track.lateral_at(x, y)
+        astray = self.astray
+        if astray.any():
+            lateral[astray] = track.lateral_from(x[astray], y[astray], self.progress[astray])
+        target = np.where(off,
+                          np.degrees(np.arctan2(-gy, -gx)),
+                          track.heading_at(self.progress + LOOKAHEAD) - lateral * CENTERING)
+
+        # Gradually adjust heading towards target angle, normalized to -180..180
+        angle_diff = (target - self.heading + 180) % 360 - 180
+        turn = angle_diff * 0.1 + self.rng.uniform(-1, 1, len(x))  # Some randomness
+        return np.where(lost, -10.0, turn)  # Turn right to find track
+
+    def step(self):
+        self.heading = (self.heading + self.steer()) % 360
+        distance = self.rng.integers(1, 6, len(self.x))
+        angle = np.radians(self.heading)
+        self.x += distance * np.cos(angle)
+        self.y += distance * np.sin(angle)
+
+        # Progress along the centerline, tracked from the last tick: the
+        # nearest-point field is used where it moved by a plausible amount,
+        # and anything else (the other branch where the course crosses
+        # itself, off-track cells) is looked up near the old progress
+        progress = self.track.progress_at(self.x, self.y).astype(float)
+        delta = self.progress_delta(progress)
+        self.astray = jumped = np.abs(delta) > PROGRESS_WINDOW
+        if jumped.any():
+            progress[jumped] = self.track.local_progress_at(self.x[jumped], self.y[jumped],
+                                                            self.progress[jumped], PROGRESS_WINDOW)
+            delta = self.progress_delta(progress)
+        # The race is won on travelled, so only count what the racer could
+        # actually have covered: no more than it moved this tick
+        self.travelled += np.clip(delta, -distance, distance)
+        self.progress = progress
+        self.ticks += 1
+
+    def progress_delta(self, progress):
+        # Change from the last tick; on a closed course a jump of more than
+        # half a lap is the racer crossing the start
+        delta = progress - self.progress
+        if self.track.closed:
+            length = self.track.length
+            delta = (delta + length / 2) % length - length / 2
+        return delta
+
+    def winner(self, finish_line):
+        # Index of the racer furthest past the finish, or None
+        crossed = np.flatnonzero(self.travelled >= finish_line)
+        return int(crossed[np.argmax(self.travelled[crossed])]) if len(crossed) else None
+
+def run_headless(field, finish_line, colors, max_ticks):
+    while field.ticks < max_ticks:
+        field.step()
+        winner = field.winner(finish_line)
+        if winner is not None:
+            print(f"{colors[winner]} turtle wins after {field.ticks} ticks!")
+            return winner
+    print(f"No finisher after {max_ticks} ticks")
     return None
 
-# Test at track location
-# Use coordinates where you know the track is drawn
-print(get_pixel_color(track_drawer.xcor(), track_drawer.ycor()))
+def run_window(course, field, finish_line, colors, frame_rate, max_ticks):
+    import turtle
 
-# Update race logic in main loop to follow curves
-def update_racer_direction(racer):
-    x, y = racer.pos()
-    color = get_pixel_color(x, y)
-    if color != "gray":  # If not on track
-        racer.right(10)  # Turn to find track
+    # Screen setup
+    screen = turtle.Screen()
+    screen.setup(width=1.0, height=1.0)  # Sets window to full screen
+    screen.title("Turtle Race")
+    # Animation stays off: each frame moves every turtle, then redraws once
+    screen.tracer(0)
+
+    # Track drawn in one batch from the compiled geometry
+    track_drawer = turtle.Turtle()
+    track_drawer.speed(0)  # Fastest speed
+    course.draw(track_drawer)
+
+    racers = []
+    for i, color in enumerate(colors):
+        racer = turtle.Turtle()
+        racer.shape("turtle")
+        racer.color(color)
+        racer.penup()
+        racer.goto(field.x[i], field.y[i])  # Start of the course
+        racer.setheading(field.heading[i])
+        racer.pendown()
+        racers.append(racer)
+    screen.update()
+
+    frame_seconds = 1 / frame_rate
+
+    def frame():
+        started = time.perf_counter()
+        field.step()
+        for racer, x, y, heading in zip(racers, field.x.tolist(), field.y.tolist(), field.heading.tolist()):
+            racer.setheading(heading)
+            racer.goto(x, y)
+        screen.update()
+
+        # Win condition
+        winner = field.winner(finish_line)
+        if winner is not None:
+            print(f"{colors[winner]} turtle wins!")
+            return
+        if field.ticks < max_ticks:
+            # Whatever this frame took comes off the wait for the next one
+            spare = frame_seconds - (time.perf_counter() - started)
+            screen.ontimer(frame, max(int(spare * 1000), 1))
+
+    screen.ontimer(frame, max(int(frame_seconds * 1000), 1))
+    turtle.done()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Turtle race")
+    parser.add_argument('--course', default="default", help="course to race on (default: %(default)s)")
+    parser.add_argument('--racers', type=int, default=1, help="number of racers (default: %(default)s)")
+    parser.add_argument('--fps', type=float, default=FRAME_RATE, help="target frame rate (default: %(default)s)")
+    parser.add_argument('--headless', action='store_true', help="simulate without drawing anything")
+    parser.add_argument('--ticks', type=int, default=100000, help="give up after this many ticks")
+    parser.add_argument('--seed', type=int, help="random seed")
+    args = parser.parse_args(argv)
+
+    course = courses.get(args.course)
+    track = course.geometry()  # Compiled geometry, cached on disk after the first run
+    finish_line = course.finish_progress(track)  # Arc length of the finish line
+    colors = [RACER_COLORS[i % len(RACER_COLORS)] for i in range(args.racers)]
+    field = Field(course, track, args.racers, np.random.default_rng(args.seed))
+
+    if args.headless:
+        run_headless(field, finish_line, colors, args.ticks)
     else:
-        x = racer.xcor()
-        y = racer.ycor()
-        
-        # Define track segments and their target directions
-        if x < -200:  # Starting straight
-            target_angle = 270
-        elif -200 <= x < 0:  # First curve
-            target_angle = 315
-        elif 0 <= x < 200:  # Second curve
-            target_angle = 0
-        else:  # Final straight
-            target_angle = 45
-        
-        # Gradually adjust heading towards target angle
-        current_heading = racer.heading()
-        angle_diff = target_angle - current_heading
-        
-        # Normalize angle difference to -180 to 180 range
-        if angle_diff > 180:
-            angle_diff -= 360
-        elif angle_diff < -180:
-            angle_diff += 360
-            
-        # Apply steering with some randomness
-        turn_amount = angle_diff * 0.1 + random.uniform(-1, 1)
-        racer.right(turn_amount)
-
-# Main race loop
-while True:
-    for racer in racers:
-        distance = random.randint(1, 5)
-        update_racer_direction(racer)
-        racer.forward(distance)
-        
-        # # Win condition
-        # if racer.xcor() >= finish_line:
-        #     print(f"{racer.color()[0]} turtle wins!")
-        #     turtle.done()
-        #     exit()
\ No newline at end of file
+        run_window(course, field, finish_line, colors, args.fps, args.ticks)
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,44 @@
+import argparse
+import os
 import random
 import time
 import tkinter as tk
 from tkinter import ttk
-import pygame.mixer
 import math
+import threading
+import numpy as np
+from render import RetainedCanvas, ItemPool, PLACEHOLDER_COORDS, flatten
+from raster import new_frame, fill_polygon, fill_rect, hline, ppm_bytes
+from layers import Layer, LayerCache
+from viewport import LaneViewport, pod_color, pod_shape
+from quality import QualityGovernor, QUALITY_LEVELS
+from particles import ParticleField
+from race_core import Race, RaceListener
+from odds import OddsEngine
+from live_odds import LiveOdds
+from game_loop import FixedStepLoop, Interpolator, TICK_SECONDS
+from profiler import PhaseProfiler, RACE_PHASES, DRAW_PHASES, dump_profiles
+from dashboard import TerminalDashboard, STATUS_RATE
+from telemetry import TelemetryRecorder
+from replay import Replay, ReplayPlayer, load_replay
 
-class Event:
-    def __init__(self, name, probability, duration, speed_modifier, lethal=False):
-        self.name = name
-        self.probability = probability
-        self.duration = duration
-        self.speed_modifier = speed_modifier
-        self.lethal = lethal
+ODDS_SIMULATIONS = 100_000  # Races simulated for the pre-race odds screen (4 racers; fewer for bigger fields)
+RACE_DISTANCE = 25000  # Updated to 25,000 meters
+RACERS = ["Pod 1", "Pod 2", "Pod 3", "Pod 4"]
+OVERLAY_REFRESH = 0.25  # Seconds between performance overlay updates
+MESSAGE_TOP = 50  # Screen y of the first event notification
+MESSAGE_HEIGHT = 30  # Pixels per event notification
+REPLAY_SPEEDS = [0.1, 0.25, 0.5, 1.0, 2.0]  # Replay playback rates; [ and ] step through them
+REPLAY_SKIP = 50  # Ticks skipped by Left/Right in a replay (one second)
 
-class Obstacle:
-    def __init__(self, lane, x_pos, size=20):
-        self.lane = lane
-        self.x_pos = x_pos
-        self.size = size
-        self.speed = 15  # Speed of approach
-        # Add vertical offset within lane (-1 for top, 0 for center, 1 for bottom)
-        self.y_offset = random.choice([-0.5, 0, 0.5])
-        
-    def update(self):
-        self.x_pos -= self.speed
-        return self.x_pos > -self.size  # Return False when off screen
+try:
+    from audio import RaceAudio
+except ImportError:  # pygame not installed: run the race without sound
+    RaceAudio = None
 
-class RaceWindow:
-    def __init__(self, master):
-        # Initialize pygame mixer with higher frequency for faster playback
-        pygame.mixer.init(44100, -16, 2, 512, allowedchanges=0)
-        pygame.mixer.set_num_channels(8)
-        
-        # Load and pre-modify sound effects
-        self.sounds = {
-            'countdown': pygame.mixer.Sound('sounds/countdown.mp3'),
-            'start': pygame.mixer.Sound('sounds/start.wav'),
-            # 'engine_trouble': pygame.mixer.Sound('sounds/engine_trouble.wav'),
-            # 'sand_storm': pygame.mixer.Sound('sounds/sand_storm.wav'),
-            # 'debris_hit': pygame.mixer.Sound('sounds/debris_hit.wav'),
-            # 'explosion': pygame.mixer.Sound('sounds/explosion.wav'),
-            # 'finish': pygame.mixer.Sound('sounds/finish.wav')
-        }
-        # Speed up countdown sound
-        self.sounds['countdown'].set_volume(0.7)  # Adjust volume to compensate for speed
-        
-        # Load background music
-        pygame.mixer.music.load('./sounds/pod_race_intro.mp3')
-        pygame.mixer.music.play(-1)  # -1 means loop forever
-        
-        # Store race theme path for later
-        self.race_theme = './sounds/pod_race_race_theme.mp3'
+class RaceWindow(RaceListener):
+    def __init__(self, master, audio=None, canvas=None, image_factory=None, quality=None):
+        self.audio = audio  # Optional RaceAudio; None runs silently
         
         self.master = master
         self.master.title("Pod Race Simulator")
@@ -58,20 +46,41 @@ class RaceWindow:
         # Set fullscreen
         self.master.attributes('-fullscreen', True)
         self.master.bind('<Escape>', lambda e: self.master.destroy())  # Allow escape to exit
+        self.master.bind('<F3>', lambda e: self.toggle_overlay())  # Performance overlay
+        # Scroll the lanes when there are more racers than fit on screen
+        self.master.bind('<MouseWheel>', lambda e: self.viewport.scroll(-1 if e.delta > 0 else 1))
+        self.master.bind('<Button-4>', lambda e: self.viewport.scroll(-1))  # X11 wheel
+        self.master.bind('<Button-5>', lambda e: self.viewport.scroll(1))
+        self.master.bind('<Up>', lambda e: self.viewport.scroll(-1))
+        self.master.bind('<Down>', lambda e: self.viewport.scroll(1))
+        self.master.bind('<Prior>', lambda e: self.viewport.scroll(-self.viewport.visible))
+        self.master.bind('<Next>', lambda e: self.viewport.scroll(self.viewport.visible))
+        self.master.bind('<Home>', lambda e: self.viewport.scroll_to(0))
         
         # Get screen dimensions
         self.width = self.master.winfo_screenwidth()
         self.height = self.master.winfo_screenheight()
         
         # Change to Tatooine sand color background
-        self.canvas = tk.Canvas(master, width=self.width, height=self.height, bg='#C2B280')  # Desert sand
+        # canvas and image_factory(width, height) can be supplied (benchmarks
+        # draw onto recording stubs)
+        self.canvas = canvas or tk.Canvas(master, width=self.width, height=self.height, bg='#C2B280')  # Desert sand
         self.canvas.pack(fill='both', expand=True)
-        
-        # Increase sand particles for more desert feel
-        self.sand_particles = [(random.randint(0, self.width), 
-                              random.randint(0, self.height), 
-                              random.uniform(1, 4))  # Larger size variation
-                             for _ in range(int((self.width * self.height) / 1000))]  # More particles
+        self.scene = RetainedCanvas(self.canvas)
+        self.viewport = LaneViewport(self.height)
+        self.race_scene_lanes = None  # Visible lane count the race items were built for
+        
+        # Increase sand particles for more desert feel; they are drawn as one image
+        self.sand = ParticleField(self.width, self.height, int((self.width * self.height) / 1000))
+        image_factory = image_factory or (lambda width, height: tk.PhotoImage(master=master, width=width, height=height))
+        self.sand_photo = image_factory(self.width, self.height)
+        
+        # Static layers (dunes, lanes, finish markers) are rendered once per
+        # size/lane count and shown as one image
+        self.layers = LayerCache()
+        self.backdrop_photo = image_factory(self.width, self.height)
+        self.backdrop_layer = None  # Layer currently loaded into backdrop_photo
+        self.race_checker = None  # Finish checker size of the race backdrop
         
         # Add dune positions
         self.dunes = [(random.randint(0, self.width), 
@@ -82,200 +91,326 @@ class RaceWindow:
         # Heat wave effect parameters
         self.heat_wave_offset = 0
         
-        # More vibrant pod colors
-        self.pod_colors = ['#FF0000', '#00FF00', '#0088FF', '#FF00FF']  # Red, Green, Blue, Magenta
-        self.pod_shapes = self.create_pod_shapes()
         self.race_started = False
         self.start_button = None
         self.button_frame = None  # Add reference to button frame
         self.event_messages = []  # List to store active event messages
-        
-    def create_pod_shapes(self):
-        # Define complex pod shapes as coordinate lists - flipped horizontally
-        shapes = [
-            [(30,0), (10,8), (0,0), (10,-8)],    # Arrow shape
-            [(30,0), (5,10), (10,0), (5,-10)],   # Diamond shape
-            [(30,0), (0,5), (5,0), (0,-5)],      # Dart shape
-            [(30,0), (10,5), (0,0), (10,-5)]     # Teardrop shape
-        ]
-        return shapes
-        
-    def draw_race(self, racers, distance, obstacles):
-        self.canvas.delete("all")
-        
-        # 1. Draw background elements first
-        # Draw background dunes at the very back
-        for x, y, size in self.dunes:
-            points = [
-                (x - size, y + size/2),  # Move dunes lower
-                (x - size/2, y + size/3),
-                (x, y),
-                (x + size/2, y + size/3),
-                (x + size, y + size/2)
-            ]
-            self.canvas.create_polygon(points, 
-                                    fill='#B8860B',
-                                    outline='#DAA520')
-        
-        # 2. Draw sand particles in background
-        for i, particle in enumerate(self.sand_particles):
-            x, y, size = particle
-            x = (x + random.uniform(1, 3)) % self.width
-            y = (y + random.uniform(-0.5, 0.5)) % self.height
-            self.sand_particles[i] = (x, y, size)
-            
-            # Only draw particles if they're in the background area
-            if y > self.height/2:  # Only draw particles in lower half of screen
-                self.canvas.create_oval(x, y, x+size, y+size, 
-                                      fill='#FFE4B5',
-                                      outline='#DEB887')
-        
-        # 3. Draw track elements
-        # More visible track lanes with Tatooine style
-        lane_height = self.height / len(racers)
-        for i in range(len(racers) + 1):
-            y = i * lane_height
-            self.canvas.create_line(0, y, self.width, y, 
-                                  fill='#FFFFFF',  # Make lanes more visible
-                                  dash=(8,4),
-                                  width=2)  # Make lines thicker
-        
-        # Update finish line to look like ancient stone markers
-        finish_x = self.width - 60
-        self.canvas.create_rectangle(finish_x-2, 0, finish_x + 22, self.height, 
-                                   fill='#8B4513',
-                                   outline='#654321')
-        for i in range(self.height // 20):
-            y = i * 20
-            if i % 2:
-                self.canvas.create_rectangle(finish_x, y, finish_x + 20, y+10, 
-                                          fill='#DEB887')
-        
-        # Draw obstacles
-        for obstacle in obstacles:
-            base_y = obstacle.lane * lane_height + lane_height/2
+        # Only as many as fit on screen; big fields fire events faster than they expire
+        self.max_messages = max(1, (self.height - MESSAGE_TOP) // MESSAGE_HEIGHT)
+        self.odds = None  # Odds for the odds screen, None until simulated
+        self.live_odds = None  # Win probability per racer during the race, None until estimated
+        
+        # Per-phase draw timings; tick_profiler is the race's, when it has one
+        self.profiler = PhaseProfiler(DRAW_PHASES)
+        self.tick_profiler = None
+        self.overlay_visible = False
+        self.overlay_updated = 0.0
+        
+        # Effects are scaled to what this machine can draw in time, unless
+        # `quality` names a fixed level
+        self.governor = QualityGovernor(fixed=quality)
+        self.sand.thin(self.governor.level.particles)
+        self.sand_settled = False  # Sand strip drawn with no particles to move
+        self.frames = 0
+        self.hud_first = None  # First lane on screen when the HUD text was last refreshed
+        
+    def build_race_scene(self, lanes):
+        # Create every race item once, for the `lanes` lanes on screen;
+        # draw_race afterwards only moves/reconfigures them and binds each
+        # lane slot to whichever racer is scrolled into it
+        self.scene.clear()
+        lane_height = self.height / lanes
+        
+        # 1. Static backdrop: sand, dunes, lanes and finish markers as one image
+        checker = self.governor.level.checker
+        layer = self.layers.get(f'race/{checker}', self.width, self.height, lanes,
+                                lambda width, height, lanes: self.render_race_layer(width, height, lanes, checker))
+        if self.backdrop_layer is not layer:
+            self.backdrop_photo.configure(data=ppm_bytes(layer.pixels), format='ppm')
+            self.backdrop_layer = layer
+        self.race_layer = layer
+        self.race_checker = checker
+        self.scene.create('image', (0, 0), image=self.backdrop_photo, anchor='nw')
+        
+        # 2. Sand particles only show in the lower half of the screen; that
+        # strip is redrawn over the backdrop every frame
+        self.sand_top = self.height // 2
+        self.scene.create('image', (0, self.sand_top), image=self.sand_photo, anchor='nw')
+        self.sand_settled = False
+        self.hud_first = None
+        
+        # 3. Dynamic items: obstacles are pooled below the racers
+        self.obstacle_pool = ItemPool(self.scene, 'polygon', below='racer',
+                                      fill='#FF0000', outline='#FFFFFF', width=2)
+        
+        self.racer_items = []
+        for i in range(lanes):
+            lane_bottom = (i + 1) * lane_height - 10  # 10 pixels from bottom of lane
+            bar_y = lane_bottom - 20  # 20 pixels above stats
+            self.racer_items.append({
+                'pod': self.scene.create('polygon', PLACEHOLDER_COORDS['polygon'],
+                                         outline='white', width=2, tags='racer'),
+                'glow': self.scene.create('oval', PLACEHOLDER_COORDS['oval'],
+                                          fill='#FF9933', outline='#FF6600', tags='racer'),
+                'effect': self.scene.create('oval', PLACEHOLDER_COORDS['oval'],
+                                            width=2, state='hidden', tags='racer'),
+                'status': self.scene.create('text', (10, lane_bottom),
+                                            anchor='sw',  # Southwest anchor for bottom alignment
+                                            font=('Arial', 12, 'bold'), tags='racer'),
+                'speed': self.scene.create('text', (200, lane_bottom),
+                                           fill='white', anchor='sw', tags='racer'),
+                'distance': self.scene.create('text', (350, lane_bottom),
+                                              fill='white', anchor='sw', tags='racer'),
+                'odds': self.scene.create('text', (500, lane_bottom),
+                                          fill='#FFFF00', anchor='sw', tags='racer'),
+                'bar_frame': self.scene.create('rectangle', (500, bar_y, 650, bar_y+5),
+                                               outline='white', tags='racer'),
+                'bar': self.scene.create('rectangle', (500, bar_y, 500, bar_y+5),
+                                         tags='racer'),
+            })
+        
+        # Where the screen is in a field too big for it
+        self.scrollbar_item = self.scene.create('rectangle', PLACEHOLDER_COORDS['rectangle'],
+                                                fill='#FFFFFF', outline='#654321', state='hidden')
+        
+        # Performance overlay, left of the finish line
+        self.overlay_item = self.scene.create('text', (self.width - 90, 10), anchor='ne',
+                                              font=('Courier', 11, 'bold'), fill='#202020',
+                                              justify='right', state='hidden')
+        self.overlay_updated = 0.0
+        
+        # Event notifications sit on top of everything
+        self.message_pool = ItemPool(self.scene, 'text', font=('Arial', 20, 'bold'))
+        self.race_scene_lanes = lanes
+        
+    def draw_race(self, racers, distance, obstacles, previous=None, alpha=1.0):
+        # `previous` (a game_loop.Interpolator) holds positions from before the
+        # latest tick; pods and obstacles are drawn `alpha` of the way from them
+        profiler = self.profiler
+        profiler.begin()
+        viewport = self.viewport
+        viewport.layout(len(racers))
+        if self.race_scene_lanes != viewport.visible:
+            self.build_race_scene(viewport.visible)
+        scene = self.scene
+        level = self.governor.level
+        profiler.mark('scene')
+        
+        # Sand particles drift; only the lower half of the screen shows them.
+        # At the lowest quality there are none, so the strip is drawn once.
+        if self.sand.active or not self.sand_settled:
+            self.sand.step()
+            self.blit_sand(self.race_layer, fill='#FFE4B5', outline='#DEB887',
+                           top=self.sand_top, mask=self.sand.y[:len(self.sand)] > self.height/2)
+            self.sand_settled = not self.sand.active
+        profiler.mark('sand')
+        
+        # Only lanes on screen are laid out and drawn
+        lanes = viewport.visible_lanes()
+        
+        # Obstacles as red hexagons, one pooled item each
+        shown = list(obstacles.in_lanes(lanes))
+        for obstacle, item in zip(shown, self.obstacle_pool.resize(len(shown))):
+            base_y = viewport.lane_center(obstacle.lane)
             y = base_y + (obstacle.y_offset * 60)  # Use same max offset as racers
-            # Draw obstacle as red hexagon
+            x_pos = previous.obstacle_x(obstacle, alpha) if previous else obstacle.x_pos
             points = []
             for i in range(6):
                 angle = i * math.pi / 3
-                px = obstacle.x_pos + obstacle.size * math.cos(angle)
+                px = x_pos + obstacle.size * math.cos(angle)
                 py = y + obstacle.size * math.sin(angle)
                 points.append((px, py))
-            self.canvas.create_polygon(points, 
-                                    fill='#FF0000', 
-                                    outline='#FFFFFF',
-                                    width=2)
-        
-        # 4. Draw racers and HUD on top of everything
-        # Draw racers with adjusted positions
-        for i, racer in enumerate(racers):
-            # Calculate positions
-            x = (racer.position / distance) * (self.width - 100)  # Adjust for wider screen
-            base_y = i * lane_height + lane_height/2
-            y = base_y + racer.y_offset  # Apply vertical offset
+            scene.coords(item, flatten(points))
+        profiler.mark('obstacles')
+        
+        # HUD text refreshes every level.hud_every frames, and whenever the
+        # lanes scroll so no slot shows another racer's numbers
+        refresh_hud = self.frames % level.hud_every == 0 or self.hud_first != viewport.first
+        if refresh_hud:
+            self.hud_first = viewport.first
+        
+        # Racers and HUD on top of everything; slot n shows lane first + n
+        for items, i in zip(self.racer_items, lanes):
+            racer = racers[i]
+            position, y_offset = previous.racer(i, racer, alpha) if previous else (racer.position, racer.y_offset)
+            x = (position / distance) * (self.width - 100)  # Adjust for wider screen
+            base_y = viewport.lane_center(i)
+            y = base_y + y_offset  # Apply vertical offset
+            color = pod_color(i)
             
-            # Draw pod
-            pod_shape = [(x+cx, y+cy) for cx,cy in self.pod_shapes[i]]
-            self.canvas.create_polygon(pod_shape, 
-                                    fill=self.pod_colors[i],
-                                    outline='white',
-                                    width=2)
+            scene.coords(items['pod'], flatten((x+cx, y+cy) for cx,cy in pod_shape(i)))
+            scene.config(items['pod'], fill=color)
             
-            # Add engine glow if not finished
-            if not racer.finished:
+            # Engine glow if not finished
+            show_glow = level.glow and not racer.finished
+            scene.show(items['glow'], show_glow)
+            if show_glow:
                 glow_x = x - 5
-                self.canvas.create_oval(glow_x-10, y-5, glow_x, y+5, 
-                                      fill='#FF9933', outline='#FF6600')
+                scene.coords(items['glow'], (glow_x-10, y-5, glow_x, y+5))
             
-            # Skip destroyed pods
-            if racer.destroyed:
-                continue
-                
-            # Draw pod with event effects
-            if racer.active_event:
-                # Add visual effect for active event
+            # Destroyed pods get no effect ring or HUD
+            hud_visible = not racer.destroyed
+            for key in ('status', 'speed', 'distance', 'odds', 'bar_frame', 'bar'):
+                scene.show(items[key], hud_visible)
+            
+            show_effect = level.effects and hud_visible and racer.active_event is not None
+            scene.show(items['effect'], show_effect)
+            if show_effect:
                 effect_color = '#FF0000' if racer.active_event.lethal else '#FFFF00'
-                self.canvas.create_oval(x-20, y-20, x+20, y+20,
-                                     outline=effect_color,
-                                     width=2)
+                scene.coords(items['effect'], (x-20, y-20, x+20, y+20))
+                scene.config(items['effect'], outline=effect_color)
             
-            # Draw HUD information at bottom of lane
-            lane_bottom = (i + 1) * lane_height - 10  # 10 pixels from bottom of lane
+            if not hud_visible or not refresh_hud:
+                continue
             
-            # Status text (name and events)
-            status_color = self.pod_colors[i]
             status_text = racer.name
-            if racer.destroyed:
-                status_text += " [DESTROYED]"
-                status_color = '#FF0000'
-            elif racer.active_event:
+            if racer.active_event:
                 status_text += f" [{racer.active_event.name}]"
-            
-            self.canvas.create_text(10, lane_bottom, 
-                                  text=status_text, 
-                                  fill=status_color, 
-                                  anchor='sw',  # Southwest anchor for bottom alignment
-                                  font=('Arial', 12, 'bold'))
-            
-            # Skip destroyed pods
-            if racer.destroyed:
-                continue
-            
-            # Speed and distance info
-            self.canvas.create_text(200, lane_bottom,
-                                  text=f"Speed: {racer.speed:.2f}x",
-                                  fill='white',
-                                  anchor='sw')
-            self.canvas.create_text(350, lane_bottom,
-                                  text=f"Distance: {racer.position:.1f}m",
-                                  fill='white',
-                                  anchor='sw')
+            scene.config(items['status'], text=status_text, fill=color)
+            scene.config(items['speed'], text=f"Speed: {racer.speed:.2f}x")
+            scene.config(items['distance'], text=f"Distance: {racer.position:.1f}m")
+            odds_text = f"Win: {self.live_odds[i]:.0%}" if self.live_odds is not None else ""
+            scene.config(items['odds'], text=odds_text)
             
             # Progress bar above stats
-            progress = (racer.position / distance) * 150
-            bar_y = lane_bottom - 20  # 20 pixels above stats
-            self.canvas.create_rectangle(500, bar_y, 650, bar_y+5, outline='white')
-            self.canvas.create_rectangle(500, bar_y, 500+progress, bar_y+5, 
-                                      fill=self.pod_colors[i])
-        
-        # Draw event notifications
-        message_height = 30
-        for i, (message, color, frames_left) in enumerate(self.event_messages):
-            self.canvas.create_text(self.width/2, 50 + i*message_height,
-                                  text=message,
-                                  fill=color,
-                                  font=('Arial', 20, 'bold'))
+            progress = (position / distance) * 150
+            bar_y = viewport.lane_top(i + 1) - 30
+            scene.coords(items['bar'], (500, bar_y, 500+progress, bar_y+5))
+            scene.config(items['bar'], fill=color)
+        
+        scene.show(self.scrollbar_item, viewport.scrollable)
+        if viewport.scrollable:
+            top, bottom = viewport.thumb()
+            scene.coords(self.scrollbar_item, (self.width - 10, top, self.width - 4, bottom))
+        profiler.mark('racers')
+        
+        # Event notifications
+        message_items = self.message_pool.resize(len(self.event_messages))
+        for i, ((message, color, frames_left), item) in enumerate(zip(self.event_messages, message_items)):
+            scene.coords(item, (self.width/2, MESSAGE_TOP + i*MESSAGE_HEIGHT))
+            scene.config(item, text=message, fill=color)
+        profiler.mark('messages')
+        
+        self.update_overlay(len(shown), len(racers))
+        profiler.mark('overlay')
             
-        # Remove expired messages
-        self.event_messages = [(m, c, f-1) for m, c, f in self.event_messages if f > 0]
-        
         self.master.update()
+        profiler.mark('flush')
+        profiler.end()
+        
+        self.frames += 1
+        if self.governor.record(profiler.sample_seconds()):
+            self.apply_quality()
+    
+    def apply_quality(self):
+        level = self.governor.level
+        self.sand.thin(level.particles)
+        if level.checker != self.race_checker:
+            self.race_scene_lanes = None  # Rebuild with this level's backdrop
+    
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.overlay_updated = 0.0  # Refresh on the next frame
+    
+    def update_overlay(self, obstacle_count, racer_count):
+        self.scene.show(self.overlay_item, self.overlay_visible)
+        now = self.profiler.clock()
+        if not self.overlay_visible or now - self.overlay_updated < OVERLAY_REFRESH:
+            return
+        self.overlay_updated = now
+        
+        frames = self.profiler.summary(last=240)
+        if not frames:
+            return
+        lines = [f"FPS {frames['rate']:5.1f}  frame p50 {frames['p50_ms']:.2f} "
+                 f"p95 {frames['p95_ms']:.2f} p99 {frames['p99_ms']:.2f} ms"]
+        ticks = self.tick_profiler.summary(last=240) if self.tick_profiler else None
+        if ticks:
+            lines.append(f"tick p50 {ticks['p50_ms']:.3f} p95 {ticks['p95_ms']:.3f} "
+                         f"p99 {ticks['p99_ms']:.3f} ms")
+        lines.append(f"items {len(self.scene)}  obstacles {obstacle_count}  racers {racer_count}  "
+                     f"quality {self.governor.level.name}")
+        for summary in (frames, ticks):
+            if summary:
+                lines.append("  ".join(f"{phase} {ms:.3f}" for phase, ms in summary['phase_mean_ms'].items()))
+        self.scene.config(self.overlay_item, text="\n".join(lines))
+
+    def blit_sand(self, layer, fill, outline, top=0, mask=None):
+        # Rasterize the particle field over `layer` from canvas row `top`
+        # down, keep the layer's lanes/markers on top and push it to the
+        # canvas as a single image
+        frame = layer.pixels[top:].copy()
+        self.sand.rasterize(frame, fill, outline, origin=(0, top), mask=mask)
+        layer.stamp(frame, top)
+        self.sand_photo.configure(data=ppm_bytes(frame), format='ppm')
+    
+    def draw_sand_screen(self, layer=None):
+        # Static full-screen sand used behind the countdown, podium and odds screens
+        if layer is None:
+            layer = self.layers.get('screen', self.width, self.height, 0, self.render_screen_layer)
+        self.blit_sand(layer, fill='#F4A460', outline='#DEB887')
+        self.canvas.create_image(0, 0, image=self.sand_photo, anchor='nw')
+    
+    def render_race_layer(self, width, height, lanes, checker=10):
+        pixels = new_frame(width, height, '#C2B280')
+        overlay = np.zeros((height, width), dtype=bool)
+        for x, y, size in self.dunes:
+            points = [
+                (x - size, y + size/2),  # Move dunes lower
+                (x - size/2, y + size/3),
+                (x, y),
+                (x + size/2, y + size/3),
+                (x + size, y + size/2)
+            ]
+            fill_polygon(pixels, points, fill='#B8860B', outline='#DAA520')
+        
+        # Lanes and finish line sit above the sand
+        lane_height = height / lanes
+        for i in range(lanes + 1):
+            hline(pixels, i * lane_height, '#FFFFFF', width=2, dash=(8, 4), mask=overlay)
+        
+        # Finish line looks like ancient stone markers; `checker` is the
+        # marker size, 0 for plain posts
+        finish_x = width - 60
+        fill_rect(pixels, finish_x-2, 0, finish_x + 22, height, '#8B4513', outline='#654321', mask=overlay)
+        for i in range(height // (2 * checker) if checker else 0):
+            y = i * 2 * checker
+            if i % 2:
+                fill_rect(pixels, finish_x, y, finish_x + 20, y+checker, '#DEB887', outline='#000000', mask=overlay)
+        return Layer(pixels, overlay)
+    
+    def render_screen_layer(self, width, height, lanes):
+        return Layer(new_frame(width, height, '#C2B280'), np.zeros((height, width), dtype=bool))
+    
+    def render_countdown_layer(self, width, height, lanes):
+        pixels = new_frame(width, height, '#C2B280')
+        overlay = np.zeros((height, width), dtype=bool)
+        lane_height = height / lanes
+        for i in range(lanes + 1):
+            hline(pixels, i * lane_height, '#CD853F', dash=(8, 4), mask=overlay)
+        finish_x = width - 60
+        fill_rect(pixels, finish_x, 0, finish_x + 20, height, '#A0522D', outline='#000000', mask=overlay)
+        for i in range(height // 20):
+            y = i * 20
+            fill_rect(pixels, finish_x, y, finish_x + 20, y+10, '#8B4513', outline='#000000', mask=overlay)
+        return Layer(pixels, overlay)
+
+    def clear_scene(self):
+        # Full-screen redraws (countdown, podium, odds) wipe the canvas, so the
+        # race scene has to be rebuilt on its next frame
+        self.scene.clear()
+        self.race_scene_lanes = None
 
     def draw_countdown(self, count):
-        self.canvas.delete("all")
+        self.clear_scene()
         # Play countdown sound
         if count == 3:
             self.play_sound('countdown')
         elif count == 0:
             self.play_sound('start')
-        # Draw basic track elements
-        for particle in self.sand_particles:
-            x, y, size = particle
-            self.canvas.create_oval(x, y, x+size, y+size, 
-                                  fill='#F4A460', 
-                                  outline='#DEB887')
-        
-        lane_height = self.height / 4
-        for i in range(5):
-            y = i * lane_height
-            self.canvas.create_line(0, y, self.width, y, fill='#CD853F', dash=(8,4))
-            
-        finish_x = self.width - 60
-        self.canvas.create_rectangle(finish_x, 0, finish_x + 20, self.height, fill='#A0522D')
-        for i in range(self.height // 20):
-            y = i * 20
-            self.canvas.create_rectangle(finish_x, y, finish_x + 20, y+10, fill='#8B4513')
+        # Draw basic track elements: sand, four lanes and the finish line in one image
+        self.draw_sand_screen(self.layers.get('countdown', self.width, self.height, 4,
+                                              self.render_countdown_layer))
         
         # Center countdown text on screen
         self.canvas.create_text(self.width/2, self.height/2,
@@ -284,15 +419,11 @@ class RaceWindow:
                               font=('Arial', int(self.height/8), 'bold'))
         self.master.update()
 
-    def draw_podium(self, racers):
-        self.canvas.delete("all")
+    def draw_podium(self, racers, hint=None):
+        self.clear_scene()
         
         # Draw sand particle background
-        for particle in self.sand_particles:
-            x, y, size = particle
-            self.canvas.create_oval(x, y, x+size, y+size, 
-                                  fill='#F4A460', 
-                                  outline='#DEB887')
+        self.draw_sand_screen()
         
         # Draw leaderboard title
         self.canvas.create_text(self.width/2, 50,
@@ -313,7 +444,7 @@ class RaceWindow:
             self.canvas.create_rectangle(x - board_width/2, y,
                                        x + board_width/2, y + entry_height - 10,
                                        fill='#1a2f2f',
-                                       outline=self.pod_colors[racers.index(racer)])
+                                       outline=pod_color(racers.index(racer)))
             
             # Draw position number
             position_text = f"#{i+1}"
@@ -325,9 +456,9 @@ class RaceWindow:
             # Draw pod
             pod_y = y + entry_height/2
             pod_x = x - board_width/2 + 120
-            pod_shape = [(pod_x+cx, pod_y+cy) for cx,cy in self.pod_shapes[racers.index(racer)]]
-            self.canvas.create_polygon(pod_shape,
-                                    fill=self.pod_colors[racers.index(racer)],
+            pod_points = [(pod_x+cx, pod_y+cy) for cx,cy in pod_shape(racers.index(racer))]
+            self.canvas.create_polygon(pod_points,
+                                    fill=pod_color(racers.index(racer)),
                                     outline='white',
                                     width=2)
             
@@ -335,7 +466,7 @@ class RaceWindow:
             name_x = x + 50
             self.canvas.create_text(name_x, y + entry_height/2 - 15,
                                   text=racer.name,
-                                  fill=self.pod_colors[racers.index(racer)],
+                                  fill=pod_color(racers.index(racer)),
                                   anchor='w',
                                   font=('Arial', 20, 'bold'))
             
@@ -352,17 +483,19 @@ class RaceWindow:
                                       fill='#FF0000',
                                       font=('Arial', 16, 'bold'))
         
+        if hint:
+            self.canvas.create_text(self.width/2, self.height - 60,
+                                  text=hint,
+                                  fill='#FFFFFF',
+                                  font=('Arial', 16, 'bold'))
+        
         self.master.update()
     
     def draw_odds_screen(self, racers):
-        self.canvas.delete("all")
+        self.clear_scene()
         
         # Draw sand particles
-        for particle in self.sand_particles:
-            x, y, size = particle
-            self.canvas.create_oval(x, y, x+size, y+size, 
-                                  fill='#F4A460', 
-                                  outline='#DEB887')
+        self.draw_sand_screen()
         
         # Draw title
         self.canvas.create_text(self.width/2, 50,
@@ -382,37 +515,49 @@ class RaceWindow:
             
             x = self.width/2 + (col - 1) * (card_width + padding)
             y = self.height/2 + (row - 1) * (card_height + padding)
+            if y >= self.height:  # Big fields: only the cards that fit on screen
+                break
             
             # Update card backgrounds for better contrast
             self.canvas.create_rectangle(x, y, x + card_width, y + card_height,
                                       fill='#1a2f2f',  # Darker slate gray
-                                      outline=self.pod_colors[i])
+                                      outline=pod_color(i))
             
             # Draw pod
             pod_x = x + 50
             pod_y = y + card_height/2
-            pod_shape = [(pod_x+cx, pod_y+cy) for cx,cy in self.pod_shapes[i]]
-            self.canvas.create_polygon(pod_shape,
-                                    fill=self.pod_colors[i],
+            pod_points = [(pod_x+cx, pod_y+cy) for cx,cy in pod_shape(i)]
+            self.canvas.create_polygon(pod_points,
+                                    fill=pod_color(i),
                                     outline='white',
                                     width=2)
             
-            # Calculate odds based on speed (higher speed = lower odds)
-            odds = round(1.0 / racer.speed * 2, 2)
+            # Monte Carlo odds, filled in by RaceController once simulated
+            if self.odds is None:
+                odds_text = "Odds: calculating..."
+                chance_text = ""
+            else:
+                fair = self.odds.fair_odds(i)
+                odds_text = f"Odds: {fair:.2f}:1" if fair is not None else "Odds: --"
+                chance_text = f"Win chance: {self.odds.win_probability(i):.1%}"
             
             # Draw racer info
             self.canvas.create_text(x + card_width - 100, y + 40,
                                   text=racer.name,
-                                  fill=self.pod_colors[i],
+                                  fill=pod_color(i),
                                   font=('Arial', 16, 'bold'))
             self.canvas.create_text(x + card_width - 100, y + 70,
                                   text=f"Base Speed: {racer.speed:.2f}x",
                                   fill='white',
                                   font=('Arial', 12))
             self.canvas.create_text(x + card_width - 100, y + 100,
-                                  text=f"Odds: {odds}:1",
+                                  text=odds_text,
                                   fill='#FFFF00',
                                   font=('Arial', 14, 'bold'))
+            self.canvas.create_text(x + card_width - 100, y + 125,
+                                  text=chance_text,
+                                  fill='white',
+                                  font=('Arial', 12))
         
         # Create start button if it doesn't exist
         if not self.start_button:
@@ -440,89 +585,63 @@ class RaceWindow:
             self.button_frame.destroy()
             self.button_frame = None
             
-        # Change music to race theme
-        pygame.mixer.music.stop()
-        pygame.mixer.music.load(self.race_theme)
-        pygame.mixer.music.play(-1)
+        if self.audio:
+            self.audio.play_race_theme()
         
         self.race_started = True
 
     def add_event_message(self, racer_name, event_name, lethal=False):
         # Find the racer's color by matching the name
         racer_index = int(racer_name.split()[-1]) - 1  # Extract number from "Pod X"
-        message_color = '#FF0000' if lethal else self.pod_colors[racer_index]
+        message_color = '#FF0000' if lethal else pod_color(racer_index)
         message = f"{racer_name}: {event_name}!"
-        self.event_messages.append((message, message_color, 60))  # Show for 60 frames
+        self.event_messages.append((message, message_color, 60))  # Show for 60 ticks
+        del self.event_messages[:-self.max_messages]  # Oldest make way
 
     def play_sound(self, sound_name):
-        try:
-            self.sounds[sound_name].play()
-        except KeyError:
-            print(f"Sound {sound_name} not found")
-
-class Racer:
-    def __init__(self, name):
-        self.name = name
-        self.position = 0
-        self.finished = False
-        self.speed = random.uniform(0.8, 1.2)
-        self.active_event = None
-        self.event_duration = 0
-        self.destroyed = False
-        self.y_offset = 0  # Vertical offset from lane center
-        self.target_y_offset = 0  # Target position for smooth movement
-        self.max_y_offset = 60  # Increased for more vertical movement
-        self.y_speed = 4  # Faster vertical movement
-        self.dodge_direction = 0  # -1 for up, 1 for down, 0 for center
-        self.target_y = 0  # Target y position within lane
-        
-    def apply_event(self, event):
-        self.active_event = event
-        self.event_duration = event.duration
-        if event.lethal:
-            self.destroyed = True
-            self.finished = True
-
-    def update_vertical_position(self):
-        # More fluid vertical movement
-        if self.dodge_direction != 0:
-            target = self.dodge_direction * self.max_y_offset
-            if self.y_offset < target:
-                self.y_offset = min(self.y_offset + self.y_speed, target)
-            elif self.y_offset > target:
-                self.y_offset = max(self.y_offset - self.y_speed, target)
-        else:
-            # Return to center when no obstacles
-            if self.y_offset > 0:
-                self.y_offset = max(self.y_offset - self.y_speed, 0)
-            elif self.y_offset < 0:
-                self.y_offset = min(self.y_offset + self.y_speed, 0)
+        # UI sounds play straight away; race events wait for the next frame
+        if self.audio:
+            self.audio.play_sound(sound_name)
+            self.audio.flush()
+    
+    # RaceListener callbacks
+    def racer_event(self, race, racer, event):
+        self.add_event_message(racer.name, event.name, event.lethal)
+    
+    def race_tick(self, race):
+        # Messages age with simulated time, not with drawn frames
+        self.event_messages = [(m, c, f-1) for m, c, f in self.event_messages if f > 0]
+    
+    def render_race(self, race, previous=None, alpha=1.0):
+        self.draw_race(race.racers, race.distance, race.obstacles, previous, alpha)
 
-class Race:
-    def __init__(self, distance, racers, window):
-        self.distance = distance
-        self.racers = [Racer(name) for name in racers]
+class RaceController:
+    # Drives the on-screen flow (odds preview, countdown) around a headless
+    # Race; once racing, a FixedStepLoop steps it and the window draws frames
+    def __init__(self, race, window):
+        self.race = race
         self.window = window
         self.countdown = 3  # Add countdown state
         self.started = False
-        self.finished_racers = []  # Add list to track finishing order
         self.preview = True  # Add preview state
-        self.events = [
-            Event("Engine Trouble", 0.005, 50, 0.5),    # 0.5% chance, reduced from 1%
-            Event("Sand Storm", 0.002, 100, 0.7),       # 0.2% chance, reduced from 0.5%
-            Event("Debris Hit", 0.003, 30, 0.6),        # 0.3% chance, reduced from 0.8%
-            Event("Critical Failure", 0.0005, 1, 0, True), # 0.05% chance, reduced from 0.1%
-        ]
-        self.obstacles = []  # List to track active obstacles
-        self.obstacle_spawn_rate = 0.015  # Reduced spawn rate
-        self.min_obstacle_spacing = 300  # Increased spacing
+        race.subscribe(window)
+        
+        # Simulate the odds off the UI thread; the odds screen redraws
+        # periodically and picks them up once ready
+        threading.Thread(target=self.compute_odds, daemon=True).start()
+        
+    def compute_odds(self):
+        engine = OddsEngine.from_race(self.race)
+        # Same number of simulated racers whatever the field size
+        simulations = max(1000, ODDS_SIMULATIONS * 4 // len(self.race.racers))
+        self.window.odds = engine.odds(self.race.racers, simulations)
         
     def update(self):
         if self.preview:
             if self.window.race_started:
                 self.preview = False
             else:
-                self.window.draw_odds_screen(self.racers)
+                self.window.draw_odds_screen(self.race.racers)
                 return
                 
         if self.countdown > 0:
@@ -535,145 +654,205 @@ class Race:
             self.started = True
             return
             
-        # Spawn new obstacles
-        if random.random() < self.obstacle_spawn_rate:
-            # Check if there's enough space for a new obstacle
-            can_spawn = True
-            spawn_lane = random.randint(0, len(self.racers)-1)
-            for obs in self.obstacles:
-                if obs.lane == spawn_lane and obs.x_pos > self.window.width - self.min_obstacle_spacing:
-                    can_spawn = False
-                    break
-            
-            if can_spawn:
-                self.obstacles.append(Obstacle(spawn_lane, self.window.width))
-        
-        # Update obstacles
-        self.obstacles = [obs for obs in self.obstacles if obs.update()]
-        
-        # Update racers with obstacle avoidance
-        for racer in self.racers:
-            if not racer.finished and not racer.destroyed:
-                # Check for collisions with obstacles
-                racer_x = (racer.position / self.distance) * (self.window.width - 100)
-                for obs in self.obstacles:
-                    if obs.lane == self.racers.index(racer):
-                        if abs(racer_x - obs.x_pos) < obs.size:
-                            # Collision! Apply penalty
-                            racer.speed *= 0.8  # Slow down
-                
-                # Update event duration
-                if racer.active_event:
-                    racer.event_duration -= 1
-                    if racer.event_duration <= 0:
-                        racer.active_event = None
-                
-                # Check for new random event
-                if not racer.active_event:
-                    for event in self.events:
-                        if random.random() < event.probability:
-                            # Play appropriate sound for event
-                            if event.lethal:
-                                self.window.play_sound('explosion')
-                            elif event.name == "Engine Trouble":
-                                self.window.play_sound('engine_trouble')
-                            elif event.name == "Sand Storm":
-                                self.window.play_sound('sand_storm')
-                            elif event.name == "Debris Hit":
-                                self.window.play_sound('debris_hit')
-                            
-                            racer.apply_event(event)
-                            # Add event notification
-                            self.window.add_event_message(racer.name, event.name, event.lethal)
-                            break
-                
-                # Calculate movement with event modifications and increased base speed
-                base_movement = random.uniform(1.0, 2.0) * racer.speed * 20  # Increased speed multiplier
-                if racer.active_event:
-                    base_movement *= racer.active_event.speed_modifier
-                
-                racer.position += base_movement
-                if racer.position >= self.distance:
-                    if not racer.finished:  # Only play finish sound once
-                        self.window.play_sound('finish')
-                    racer.finished = True
-                    racer.position = self.distance
-                    if racer not in self.finished_racers:
-                        self.finished_racers.append(racer)
-                
-                # Check for upcoming obstacles
-                racer_x = (racer.position / self.distance) * (self.window.width - 100)
-                
-                # Reset dodge direction if no obstacles nearby
-                nearest_obstacle = None
-                min_distance = float('inf')
-                
-                # Find nearest obstacle in racer's lane
-                for obs in self.obstacles:
-                    if obs.lane == self.racers.index(racer):
-                        distance = obs.x_pos - racer_x
-                        if 0 < distance < min_distance:
-                            min_distance = distance
-                            nearest_obstacle = obs
-                
-                # Update dodge behavior with chance to not dodge
-                if nearest_obstacle and min_distance < 300:  # Detection range
-                    if racer.dodge_direction == 0:
-                        # 80% chance to attempt dodge
-                        if random.random() < 0.8:
-                            # Choose dodge direction based on position in lane
-                            lane_center = (self.racers.index(racer) + 0.5) * (self.window.height / len(self.racers))
-                            racer.dodge_direction = -1 if racer.y_offset < lane_center else 1
-                        else:
-                            # No dodge attempt
-                            racer.dodge_direction = 0
-                elif min_distance > 100:  # Return to center after passing obstacle
-                    racer.dodge_direction = 0
-                
-                # Hit detection happens regardless of dodge attempt
-                if nearest_obstacle and abs(racer_x - nearest_obstacle.x_pos) < nearest_obstacle.size:
-                    racer.speed *= 0.8  # Slow down
-                
-                # Update vertical position
-                racer.update_vertical_position()
-                
-        self.window.draw_race(self.racers, self.distance, self.obstacles)  # Add obstacles parameter
+        self.race.step()
+
+class ReplayViewer:
+    # Plays a recorded race back in the race window. The slider scrubs,
+    # Left/Right skip a second, [ and ] change the speed (down to a tenth
+    # for slow motion) and space pauses. Frames between ticks are drawn
+    # interpolated, as in the live race, so slow motion stays smooth.
+    def __init__(self, root, window, replay, clock=time.perf_counter):
+        self.root = root
+        self.window = window
+        self.player = ReplayPlayer(replay)
+        self.first = replay.keyframes[0]['tick']
+        self.last = replay.ticks
+        self.clock = clock
+        self.position = float(self.first)  # Playback position in ticks
+        self.speed = REPLAY_SPEEDS.index(1.0)
+        self.paused = False
+        self.previous = Interpolator()  # The race one tick before the one shown
+        self.last_time = None
+        window.clear_scene()
+        window.event_messages = []
+        window.live_odds = None
+        
+        self.controls = tk.Frame(root, bg='#1a2f2f')
+        self.controls.place(relx=0.5, rely=0.96, relwidth=0.6, anchor='center')
+        self.label = tk.Label(self.controls, font=('Courier', 12, 'bold'), width=30,
+                              fg='white', bg='#1a2f2f')
+        self.label.pack(side='left')
+        self.slider = tk.Scale(self.controls, from_=self.first, to=self.last, orient='horizontal',
+                               showvalue=False, highlightthickness=0, bg='#1a2f2f',
+                               troughcolor='#C2B280', command=self.scrub)
+        self.slider.pack(side='left', fill='x', expand=True)
+        root.bind('<space>', lambda e: self.toggle_pause())
+        root.bind('<Left>', lambda e: self.skip(-REPLAY_SKIP))
+        root.bind('<Right>', lambda e: self.skip(REPLAY_SKIP))
+        root.bind('<bracketleft>', lambda e: self.change_speed(-1))
+        root.bind('<bracketright>', lambda e: self.change_speed(1))
+    
+    def start(self):
+        self.last_time = self.clock()
+        self.root.after(0, self.frame)
     
-    def is_race_finished(self):
-        return all(racer.finished for racer in self.racers)
+    def scrub(self, value):
+        # Slider dragged; frame() setting it to the current tick is ignored
+        if int(float(value)) != int(self.position):
+            self.position = max(self.first, min(float(value), self.last))
     
-    def display_status(self):
-        print("\n" + "=" * 50)
-        for racer in self.racers:
-            progress = int((racer.position / self.distance) * 20)
-            print(f"{racer.name}: {'#' * progress}{'-' * (20-progress)} {racer.position:.1f}m")
+    def skip(self, ticks):
+        self.position = max(self.first, min(self.position + ticks, self.last))
+    
+    def toggle_pause(self):
+        self.paused = not self.paused
+    
+    def change_speed(self, step):
+        self.speed = max(0, min(self.speed + step, len(REPLAY_SPEEDS) - 1))
+    
+    def frame(self):
+        now = self.clock()
+        if not self.paused:
+            ticks = (now - self.last_time) / TICK_SECONDS * REPLAY_SPEEDS[self.speed]
+            self.position = min(self.position + ticks, self.last)
+        self.last_time = now
+        
+        # Draw the race `alpha` of the way from the tick before the position
+        # to the one after; seeking back restores a keyframe, seeking on
+        # from the current tick only steps
+        tick = min(int(self.position) + 1, self.last)
+        if self.player.race.ticks != tick:
+            self.previous.capture(self.player.seek(tick - 1))
+            self.player.seek(tick)
+        alpha = min(self.position - (tick - 1), 1.0)
+        self.window.render_race(self.player.race, self.previous, alpha)
+        
+        self.slider.set(int(self.position))
+        state = "  PAUSED" if self.paused else ""
+        self.label.config(text=f"REPLAY {REPLAY_SPEEDS[self.speed]:g}x  "
+                               f"{self.position * TICK_SECONDS:5.1f}s / {self.last * TICK_SECONDS:.1f}s{state}")
+        self.root.after(int(TICK_SECONDS * 1000), self.frame)
+
+def racer_names(count):
+    return RACERS[:count] + [f"Pod {i + 1}" for i in range(len(RACERS), count)]
 
-def main():
+def run_batch_mode(args):
+    from batch import run_batch
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+    print(f"Running {args.batch} races on {args.workers} worker(s), seed {seed}")
+    started = time.perf_counter()
+    standings = run_batch(args.batch, args.workers, seed, RACE_DISTANCE, racer_names(args.racers))
+    print(standings.table())
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pod Race Simulator")
+    parser.add_argument('--batch', type=int, metavar='RACES',
+                        help="run RACES races headless and print the standings")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes for --batch (default: all cores)")
+    parser.add_argument('--racers', type=int, default=len(RACERS),
+                        help="pods in the race (default: %(default)s); lanes scroll when they don't fit")
+    parser.add_argument('--quality', default='auto', choices=['auto'] + [level.name for level in QUALITY_LEVELS],
+                        help="render quality (default: adjusted to hold the frame rate)")
+    parser.add_argument('--status-rate', type=float, default=STATUS_RATE, metavar='HZ',
+                        help="terminal status refreshes per second, 0 for none (default: %(default)s)")
+    parser.add_argument('--seed', type=int,
+                        help="race seed, or with --batch the seed of the whole league (default: random)")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="write per-phase tick and frame timings to FILE (.json or .csv) when the race ends")
+    parser.add_argument('--telemetry', metavar='DIR',
+                        help="record every tick of the race to DIR (see telemetry.load_telemetry)")
+    parser.add_argument('--save-replay', metavar='FILE',
+                        help="save a replay of the race to FILE when it ends")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="watch a replay saved with --save-replay instead of racing")
+    args = parser.parse_args(argv)
+    if args.batch:
+        run_batch_mode(args)
+        return
+    quality = None if args.quality == 'auto' else args.quality
+    
+    if args.replay:
+        root = tk.Tk()
+        ReplayViewer(root, RaceWindow(root, quality=quality), load_replay(args.replay)).start()
+        root.mainloop()
+        return
+    
+    audio = RaceAudio() if RaceAudio else None
+    
     root = tk.Tk()
-    race_window = RaceWindow(root)
+    race_window = RaceWindow(root, audio, quality=quality)
+    
+    race = Race(RACE_DISTANCE, racer_names(args.racers), race_window.width, race_window.height, seed=args.seed)
+    race.profiler = race_window.tick_profiler = PhaseProfiler(RACE_PHASES)
+    # Seed plus keyframes: enough to replay any moment of the race
+    replay = race.subscribe(Replay.record(race))
+    if audio:
+        race.subscribe(audio)
+    # Race status in the terminal, throttled (and off when stdout isn't one)
+    dashboard = race.subscribe(TerminalDashboard(rate=args.status_rate))
+    # Win probabilities for the HUD, re-estimated in another process
+    live_odds = race.subscribe(LiveOdds(OddsEngine.from_race(race), len(race.racers)))
+    telemetry = race.subscribe(TelemetryRecorder(args.telemetry, race)) if args.telemetry else None
+    controller = RaceController(race, race_window)
+    
+    def step_race():
+        controller.update()
+    
+    def render(previous, alpha):
+        race_window.live_odds = live_odds.poll()
+        race_window.render_race(race, previous, alpha)
+        if audio:
+            audio.flush()  # Sounds for this frame's race events
+
+    def finish_race():
+        live_odds.close()
+        if audio:
+            audio.flush()
+        dashboard.refresh(race)
+        print(f"\nRace finished! (seed {race.seed})")
+        # Show podium with first 3 finishers
+        race_window.draw_podium(race.finished_racers[:3], hint="Press R to watch the replay")
+        root.bind('<r>', lambda e: watch_replay())
+        # Print full results
+        for i, racer in enumerate(race.finished_racers, 1):
+            print(f"{i}. {racer.name}")
+        if args.profile:
+            dump_profiles(args.profile, ticks=race.profiler, frames=race_window.profiler)
+            print(f"Timings written to {args.profile}")
+        if telemetry:
+            telemetry.close()
+            print(f"Telemetry written to {args.telemetry}")
+        if args.save_replay:
+            replay.save(args.save_replay)
+            print(f"Replay saved to {args.save_replay}")
+    
+    def watch_replay():
+        root.unbind('<r>')
+        ReplayViewer(root, race_window, replay).start()
     
-    racers = ["Pod 1", "Pod 2", "Pod 3", "Pod 4"]
-    race = Race(25000, racers, race_window)  # Updated to 25,000 meters
+    # The race itself runs on a fixed timestep, so its pace doesn't depend
+    # on how quickly this machine draws
+    loop = FixedStepLoop(root, race, step_race, render, on_finished=finish_race)
     
     def update_race():
-        if not race.started or not race.is_race_finished():
-            race.update()
-            if race.started and not race.preview:  # Only show status after preview and countdown
-                race.display_status()
-            root.after(1400 if race.countdown >= 0 else 20, update_race)  # Even faster update rate
+        # Odds preview and countdown
+        if not controller.started:
+            controller.update()
+            root.after(1400 if controller.countdown >= 0 else 20, update_race)
         else:
-            print("\nRace finished!")
-            # Show podium with first 3 finishers
-            race_window.draw_podium(race.finished_racers[:3])
-            # Print full results
-            for i, racer in enumerate(race.finished_racers, 1):
-                print(f"{i}. {racer.name}")
+            loop.start()
 
     try:
         update_race()
         root.mainloop()
     finally:
-        pygame.mixer.quit()  # Clean up pygame mixer
+        live_odds.close()
+        if audio:
+            audio.close()
+        if telemetry:
+            telemetry.close()  # Window closed mid-race: keep what was recorded
 
 if __name__ == "__main__":
     main()
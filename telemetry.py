@@ -0,0 +1,208 @@
+import json
+import os
+import queue
+import struct
+import threading
+from itertools import chain, repeat
+from operator import attrgetter
+import numpy as np
+from race_core import RaceListener
+
+# Per-tick race telemetry for offline analysis. Every column is a .npy file
+# in the output directory, so np.load(path, mmap_mode='r') opens any of them
+# instantly whatever the length of the race:
+#   tick                  (ticks,)         int32
+#   position              (ticks, racers)  float32  metres
+#   speed                 (ticks, racers)  float32
+#   y_offset              (ticks, racers)  float32
+#   event                 (ticks, racers)  int8     index into meta.json "events", -1 for none
+#   destroyed             (ticks, racers)  bool
+#   obstacle_tick         (rows,)          int32    one row per obstacle per tick
+#   obstacle_lane         (rows,)          int32
+#   obstacle_x            (rows,)          float32  screen pixels
+# plus meta.json with the racer names, distance, arena size and event names.
+#
+# Ticks are recorded into chunks that a background thread appends to the
+# files. For a Race, a tick only reads each racer's attributes (C-level maps
+# over the field, no per-racer Python code) into flat lists; the writer
+# converts a whole chunk of them to typed columns at once. A MassRace's
+# arrays are copied straight into a preallocated block instead; chunks get
+# shorter as fields get bigger, so that's 16 MB even at 50,000 racers.
+# Obstacles are sparse, so their rows go into lists that grow with them.
+# Written chunks go back into the pool, and the .npy headers are written
+# with room to spare and patched with the final row counts on close.
+#
+# In the game a tick has 20 ms to spare. Headless and batch runs don't:
+# recording still costs a small field's Race.step a large fraction of the
+# step itself (see the benchmark's telemetry case).
+
+CHUNK_TICKS = 1024  # Ticks per chunk
+CHUNK_RACER_TICKS = 2**18  # Racers times ticks per chunk at most, so huge fields get shorter chunks
+HEADER_BYTES = 128  # Fixed .npy header size, so it can be rewritten in place
+
+RACER_COLUMNS = {
+    'position': np.float32,
+    'speed': np.float32,
+    'y_offset': np.float32,
+    'event': np.int8,
+    'destroyed': np.bool_,
+}
+OBSTACLE_COLUMNS = {
+    'obstacle_tick': np.int32,
+    'obstacle_lane': np.int32,
+    'obstacle_x': np.float32,
+}
+RECORD_FIELDS = ('position', 'speed', 'y_offset', 'destroyed')  # Read off each Racer; 'event' separately
+racer_record = attrgetter(*RECORD_FIELDS)
+active_event = attrgetter('active_event')
+obstacle_lane = attrgetter('lane')
+obstacle_x = attrgetter('x_pos')
+
+def chunk_ticks_for(racers):
+    return max(16, min(CHUNK_TICKS, CHUNK_RACER_TICKS // max(racers, 1)))
+
+class Chunk:
+    def __init__(self, racers, ticks=CHUNK_TICKS, copied=False):
+        self.capacity = ticks
+        self.tick = np.empty(ticks, dtype=np.int32)
+        # MassRace arrays are copied into a block (fields in RACER_COLUMNS order)
+        self.racers = np.empty((ticks, racers, len(RACER_COLUMNS)), dtype=np.float32) if copied else None
+        self.records = []  # Race: racer_record() fields of every racer, tick after tick
+        self.events = []  # Race: event index of every racer, tick after tick
+        self.obstacle = {name: [] for name in OBSTACLE_COLUMNS}
+        self.ticks = 0
+
+    def clear(self):
+        self.ticks = 0
+        self.records.clear()
+        self.events.clear()
+        for column in self.obstacle.values():
+            column.clear()
+
+    def columns(self, racers):
+        # (file name, filled rows as the column's dtype) of every column
+        yield 'tick', self.tick[:self.ticks]
+        if self.racers is not None:
+            for i, (name, dtype) in enumerate(RACER_COLUMNS.items()):
+                yield name, self.racers[:self.ticks, :, i].astype(dtype)
+        else:
+            records = np.fromiter(self.records, dtype=np.float32, count=len(self.records))
+            records = records.reshape(self.ticks, racers, len(RECORD_FIELDS))
+            for i, name in enumerate(RECORD_FIELDS):
+                yield name, records[:, :, i].astype(RACER_COLUMNS[name])
+            yield 'event', np.array(self.events, dtype=np.int8).reshape(self.ticks, racers)
+        for name, dtype in OBSTACLE_COLUMNS.items():
+            yield name, np.array(self.obstacle[name], dtype=dtype)
+
+def npy_header(dtype, shape):
+    # Version 1.0 header padded to HEADER_BYTES
+    header = repr({'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                   'fortran_order': False, 'shape': tuple(shape)})
+    header = header.ljust(HEADER_BYTES - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+class TelemetryRecorder(RaceListener):
+    def __init__(self, path, race, chunk_ticks=None):
+        self.path = path
+        self.racers = len(race.racers)
+        self.chunk_ticks = chunk_ticks or chunk_ticks_for(self.racers)
+        self.copied = getattr(race, 'state', None) is not None  # MassRace
+        self.event_index = {event: i for i, event in enumerate(race.events)}
+        self.rows = {'tick': 0, 'obstacle': 0}
+        self.failed = None
+
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'racers': [racer.name for racer in race.racers],
+                       'distance': race.distance, 'width': race.width, 'height': race.height,
+                       'events': [event.name for event in race.events]}, f, indent=2)
+        self.dtypes = {'tick': np.int32, **RACER_COLUMNS, **OBSTACLE_COLUMNS}
+        self.files = {}
+        for name, dtype in self.dtypes.items():
+            f = open(os.path.join(path, f"{name}.npy"), 'wb')
+            f.write(npy_header(dtype, self.shape(name, 0)))
+            self.files[name] = f
+
+        self.free = queue.Queue()  # Written chunks, ready for reuse
+        self.pending = queue.Queue()  # Full chunks for the writer; None to stop
+        self.chunk = Chunk(self.racers, self.chunk_ticks, self.copied)
+        self.writer = threading.Thread(target=self.write_chunks, daemon=True)
+        self.writer.start()
+
+    def shape(self, name, rows):
+        return (rows, self.racers) if name in RACER_COLUMNS else (rows,)
+
+    def race_tick(self, race):
+        # Emitted at the end of every Race.step
+        tick = race.ticks - 1  # The tick just simulated
+        chunk = self.chunk
+        if chunk.ticks == chunk.capacity:
+            chunk = self.hand_off()
+
+        chunk.tick[chunk.ticks] = tick
+        if self.copied:
+            state = race.state
+            record = chunk.racers[chunk.ticks]
+            for i, column in enumerate((state.position, state.speed, state.y_offset,
+                                        state.event_id, state.destroyed)):
+                record[:, i] = column
+        else:
+            racers = race.racers
+            chunk.records.extend(chain.from_iterable(map(racer_record, racers)))
+            chunk.events.extend(map(self.event_index.get, map(active_event, racers), repeat(-1)))
+        chunk.ticks += 1
+
+        index = race.obstacles
+        if index.occupied:
+            obstacles = list(chain.from_iterable(map(index.buckets.__getitem__, index.occupied)))
+            columns = chunk.obstacle
+            columns['obstacle_tick'].extend(repeat(tick, len(obstacles)))
+            columns['obstacle_lane'].extend(map(obstacle_lane, obstacles))
+            columns['obstacle_x'].extend(map(obstacle_x, obstacles))
+
+    def hand_off(self):
+        # Queue the current chunk for writing and carry on in a fresh one
+        self.pending.put(self.chunk)
+        try:
+            self.chunk = self.free.get_nowait()
+        except queue.Empty:
+            self.chunk = Chunk(self.racers, self.chunk_ticks, self.copied)
+        return self.chunk
+
+    def write_chunks(self):
+        while True:
+            chunk = self.pending.get()
+            if chunk is None:
+                return
+            if self.failed is None:
+                try:
+                    for name, column in chunk.columns(self.racers):
+                        self.files[name].write(column.tobytes())
+                    self.rows['tick'] += chunk.ticks
+                    self.rows['obstacle'] += len(chunk.obstacle['obstacle_tick'])
+                except OSError as e:  # Disk full or similar: the race carries on without it
+                    self.failed = e
+                    print(f"Telemetry stopped: {e}")
+            chunk.clear()
+            self.free.put(chunk)
+
+    def close(self):
+        # Write out what's left and patch the headers with the row counts
+        if self.writer.is_alive():
+            self.pending.put(self.chunk)
+            self.pending.put(None)
+            self.writer.join()
+        for name, f in self.files.items():
+            if not f.closed:
+                rows = self.rows['obstacle' if name in OBSTACLE_COLUMNS else 'tick']
+                f.seek(0)
+                f.write(npy_header(self.dtypes[name], self.shape(name, rows)))
+                f.close()
+
+def load_telemetry(path):
+    # {column: memory-mapped array} plus 'meta'
+    with open(os.path.join(path, 'meta.json')) as f:
+        columns = {'meta': json.load(f)}
+    for name in ('tick', *RACER_COLUMNS, *OBSTACLE_COLUMNS):
+        columns[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+    return columns
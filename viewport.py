@@ -0,0 +1,83 @@
+import colorsys
+import random
+from functools import lru_cache
+
+# Virtualized lane layout for the race view. Lanes never get shorter than
+# MIN_LANE_HEIGHT; once there are more racers than that fits, the screen
+# shows a window of consecutive lanes that scrolls a whole lane at a time.
+# The lane lines on screen are then the same wherever it's scrolled to (so
+# the cached backdrop stays valid), and the race scene only needs items
+# for the lanes on screen, whatever the size of the field.
+
+MIN_LANE_HEIGHT = 90  # 12 lanes on a 1080 pixel screen
+
+# The first four pods keep their hand-picked looks; the rest are generated
+POD_COLORS = ['#FF0000', '#00FF00', '#0088FF', '#FF00FF']  # Red, Green, Blue, Magenta
+POD_SHAPES = [
+    # Coordinate lists, nose to the right
+    [(30,0), (10,8), (0,0), (10,-8)],    # Arrow shape
+    [(30,0), (5,10), (10,0), (5,-10)],   # Diamond shape
+    [(30,0), (0,5), (5,0), (0,-5)],      # Dart shape
+    [(30,0), (10,5), (0,0), (10,-5)]     # Teardrop shape
+]
+GOLDEN_RATIO = 0.618033988749895  # Hue step that keeps neighbouring pods far apart
+
+@lru_cache(maxsize=None)
+def pod_color(index):
+    if index < len(POD_COLORS):
+        return POD_COLORS[index]
+    r, g, b = colorsys.hsv_to_rgb((index * GOLDEN_RATIO) % 1.0, 0.85, 1.0)
+    return f"#{int(r * 255):02X}{int(g * 255):02X}{int(b * 255):02X}"
+
+@lru_cache(maxsize=None)
+def pod_shape(index):
+    # Nose, wing, tail notch, wing: the same outline as the built-in shapes
+    # with the proportions drawn from the pod's index, so a pod looks the
+    # same every race
+    if index < len(POD_SHAPES):
+        return POD_SHAPES[index]
+    rng = random.Random(index)
+    wing_x, wing_y, tail = rng.uniform(0, 12), rng.uniform(5, 11), rng.uniform(0, 10)
+    return [(30, 0), (wing_x, wing_y), (tail, 0), (wing_x, -wing_y)]
+
+class LaneViewport:
+    def __init__(self, height, min_lane_height=MIN_LANE_HEIGHT):
+        self.height = height
+        self.min_lane_height = min_lane_height
+        self.lanes = 0  # Lanes in the race
+        self.visible = 1  # Lanes on screen
+        self.first = 0  # Lane at the top of the screen
+        self.lane_height = height
+
+    def layout(self, lanes):
+        # Called every frame with the racer count; only does work when it changes
+        if lanes != self.lanes:
+            self.lanes = lanes
+            self.visible = max(1, min(lanes, int(self.height // self.min_lane_height)))
+            self.lane_height = self.height / self.visible
+            self.scroll_to(self.first)
+
+    @property
+    def scrollable(self):
+        return self.lanes > self.visible
+
+    def scroll_to(self, lane):
+        self.first = max(0, min(int(lane), self.lanes - self.visible))
+
+    def scroll(self, lanes):
+        self.scroll_to(self.first + lanes)
+
+    def visible_lanes(self):
+        return range(self.first, min(self.first + self.visible, self.lanes))
+
+    def lane_top(self, lane):
+        # Screen y of the top of a lane (off screen for lanes not visible)
+        return (lane - self.first) * self.lane_height
+
+    def lane_center(self, lane):
+        return (lane - self.first + 0.5) * self.lane_height
+
+    def thumb(self):
+        # Scrollbar thumb (top, bottom) in screen pixels
+        return (self.first / self.lanes * self.height,
+                (self.first + self.visible) / self.lanes * self.height)